@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import StreamingHttpResponse
+from rest_framework.permissions import SAFE_METHODS
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_READ_WORKERS,
+            thread_name_prefix='read',
+        )
+    return _executor
+
+
+def render_view(view, request, *args, **kwargs):
+    """Run a sync view to a rendered response inside a pool thread.
+
+    Pool threads keep their own database connection, so it is checked
+    around every call the way the request cycle does for WSGI workers.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Wrap a DRF view so that reads do not block the event loop.
+
+    Safe methods run on a bounded thread pool, one database connection
+    per thread, so a slow query only holds a pool thread. Writes keep
+    Django's default for sync views under ASGI.
+    """
+    run_write = sync_to_async(view)
+    run_read = sync_to_async(
+        render_view, thread_sensitive=False, executor=get_executor(),
+    )
+
+    @wraps(view)
+    async def wrapped_view(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await run_read(view, request, *args, **kwargs)
+        return await run_write(request, *args, **kwargs)
+
+    return wrapped_view
+
+
+class AsyncStreamingHttpResponse(StreamingHttpResponse):
+    """A streaming response that ASGI sends without blocking the loop.
+
+    WSGI iterates it as usual. Under ASGI ``foodgram.asgi`` iterates
+    ``__aiter__`` instead, which fetches every chunk of the (middleware
+    wrapped) content with ``sync_to_async`` in the thread that ran the
+    view, where lazy queries over its database connection can run.
+    """
+
+    async def __aiter__(self):
+        chunks = iter(self)
+        get_next = sync_to_async(next, thread_sensitive=True)
+        done = object()
+        while True:
+            chunk = await get_next(chunks, done)
+            if chunk is done:
+                return
+            yield chunk
@@ -0,0 +1,263 @@
+import threading
+import time
+from functools import wraps
+from hashlib import sha256
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from recipes.constants import (ANONYMOUS_PAGE_CACHE_TIMEOUT,
+                               ANONYMOUS_PAGE_PARAMS,
+                               ANONYMOUS_PAGE_STALE_TIMEOUT,
+                               COMPRESSION_MIN_SIZE, PAGE_CACHE_LOCK_TIMEOUT,
+                               PAGE_CACHE_POLL_INTERVAL,
+                               RESPONSE_CACHE_TIMEOUT)
+from .compression import COMPRESSORS, compress, negotiate_encoding
+from .renderers import FastJSONRenderer
+
+JSON_TYPE = 'application/json'
+
+
+# Versions expire like the responses cached under them: with a per-process
+# cache (LocMemCache) a bump from another process, e.g. a management
+# command, is never seen, and this bounds how long old data is served.
+
+def get_data_version(name):
+    key = f'data-version:{name}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, RESPONSE_CACHE_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(name):
+    cache.set(f'data-version:{name}', uuid4().hex, RESPONSE_CACHE_TIMEOUT)
+
+
+def encoded_variants(body):
+    """The body and, unless it is tiny, its compressed variants."""
+    variants = {None: body}
+    if len(body) >= COMPRESSION_MIN_SIZE:
+        variants.update(
+            (encoding, compress(body, encoding)) for encoding in COMPRESSORS
+        )
+    return variants
+
+
+def variant_response(request, variants):
+    encoding = negotiate_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''),
+    )
+    if encoding not in variants:
+        encoding = None
+    response = HttpResponse(variants[encoding], content_type=JSON_TYPE)
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+class CachedListMixin:
+    """Serve the unfiltered list from pre-rendered JSON keyed by version.
+
+    ``cache_data_name`` names the data version that signals bump when the
+    underlying rows change; a matching ``If-None-Match`` gets a 304
+    without touching the database. Compressed variants are cached too.
+    """
+    cache_data_name = None
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        version = get_data_version(self.cache_data_name)
+        # Weak, since the bytes sent depend on the negotiated encoding.
+        etag = f'W/"{self.cache_data_name}-{version}"'
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+        key = f'encoded-response:{self.cache_data_name}:{version}'
+        cached = cache.get(key)
+        if cached is None:
+            cached = encoded_variants(FastJSONRenderer().render(
+                super().list(request, *args, **kwargs).data
+            ))
+            cache.set(key, cached, RESPONSE_CACHE_TIMEOUT)
+        response = variant_response(request, cached)
+        response['ETag'] = etag
+        return response
+
+
+class PageCache:
+    """Rendered responses under a data version, with stampede protection.
+
+    An entry is fresh for ``timeout`` seconds while its data version is
+    current. Past that, one request re-renders it under a lock (``add``
+    is atomic in the local-memory cache as well as in shared ones) while
+    concurrent requests get the stale entry; with no usable entry they
+    wait for the lock holder up to ``lock_timeout`` seconds and render
+    themselves if it stores nothing (e.g. the response was a 404, which
+    also drops the entry).
+    """
+
+    def __init__(self, data_name, timeout, stale_timeout, lock_timeout):
+        self.data_name = data_name
+        self.timeout = timeout
+        self.stale_timeout = stale_timeout
+        self.lock_timeout = lock_timeout
+        self.lock = threading.Lock()
+        self.counts = dict.fromkeys(
+            ('hit', 'stale', 'wait', 'miss', 'bypass'), 0,
+        )
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def is_fresh(self, entry, version):
+        return (
+            entry is not None and entry['version'] == version
+            and entry['fresh_until'] > time.time()
+        )
+
+    def wait(self, key, lock_key, version):
+        """The entry the lock holder stores, None if it gave up."""
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(PAGE_CACHE_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None and entry['version'] == version:
+                return entry
+            if cache.get(lock_key) is None:
+                return None
+        return None
+
+    def get_or_render(self, key, render, stale_versions=True):
+        """Variants cached under ``key``, rendered by ``render`` if needed.
+
+        ``render`` returns the body or None when the response must not be
+        cached; None is returned then and the entry is removed. With
+        ``stale_versions`` false an entry of an older data version is
+        never served, only one that is merely past ``timeout``.
+        """
+        key = f'page:{self.data_name}:{key}'
+        version = get_data_version(self.data_name)
+        entry = cache.get(key)
+        if self.is_fresh(entry, version):
+            self.count('hit')
+            return entry['variants']
+        lock_key = f'{key}:lock'
+        locked = cache.add(lock_key, True, self.lock_timeout)
+        if entry is not None and not stale_versions:
+            if entry['version'] != version:
+                entry = None
+        if not locked:
+            if entry is not None:
+                self.count('stale')
+                return entry['variants']
+            entry = self.wait(key, lock_key, version)
+            if entry is not None:
+                self.count('wait')
+                return entry['variants']
+        self.count('miss')
+        try:
+            body = render()
+            if body is None:
+                cache.delete(key)
+                return None
+            variants = encoded_variants(body)
+            cache.set(key, {
+                'version': version,
+                'fresh_until': time.time() + self.timeout,
+                'variants': variants,
+            }, self.stale_timeout)
+            return variants
+        finally:
+            if locked:
+                cache.delete(lock_key)
+
+    def export(self):
+        """Counters in the Prometheus text format, see api.metrics."""
+        with self.lock:
+            counts = dict(self.counts)
+        lines = [
+            '# HELP foodgram_page_cache_total Anonymous page cache lookups.',
+            '# TYPE foodgram_page_cache_total counter',
+        ]
+        lines.extend(
+            f'foodgram_page_cache_total{{result="{name}"}} {value}'
+            for name, value in counts.items()
+        )
+        return lines
+
+
+page_cache = PageCache(
+    'recipes',
+    timeout=ANONYMOUS_PAGE_CACHE_TIMEOUT,
+    stale_timeout=ANONYMOUS_PAGE_STALE_TIMEOUT,
+    lock_timeout=PAGE_CACHE_LOCK_TIMEOUT,
+)
+
+
+def anonymous_page_key(request):
+    """Cache key of an anonymous JSON request, or None if not cacheable.
+
+    Only ``ANONYMOUS_PAGE_PARAMS`` may be present; they are normalized so
+    that e.g. ``tags`` order and the default first page share an entry.
+    The host is part of the key since responses carry absolute URLs.
+    """
+    if (not request.user.is_anonymous
+            or request.accepted_renderer.format != 'json'
+            or not set(request.query_params) <= set(ANONYMOUS_PAGE_PARAMS)):
+        return None
+    params = []
+    for name in sorted(request.query_params):
+        values = sorted({
+            value.strip() for value in request.query_params.getlist(name)
+            if value.strip()
+        })
+        if name == 'page' and values == ['1']:
+            continue
+        params.extend((name, value) for value in values)
+    return sha256(
+        f'{request.build_absolute_uri(request.path)}?{urlencode(params)}'
+        .encode()
+    ).hexdigest()
+
+
+def cache_anonymous_page(view_method):
+    """Serve a view's successful anonymous responses from ``page_cache``.
+
+    Cached bodies are those of anonymous readers, so reader flags are
+    false; ``favorites_count`` may lag by ANONYMOUS_PAGE_CACHE_TIMEOUT.
+    Lists may be served from an older data version while one request
+    re-renders them; detail pages are not, so an edited or deleted
+    recipe is never shown from before the change.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = anonymous_page_key(request)
+        if key is None:
+            page_cache.count('bypass')
+            return view_method(self, request, *args, **kwargs)
+        response = None
+
+        def render():
+            nonlocal response
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return None
+            return FastJSONRenderer().render(response.data)
+
+        variants = page_cache.get_or_render(
+            key, render, stale_versions=not self.detail,
+        )
+        if variants is None:
+            return response
+        return variant_response(request, variants)
+    return wrapper
@@ -0,0 +1,72 @@
+"""Content-Encoding negotiation and gzip/brotli compressors.
+
+Brotli is offered only when the ``brotli`` package is installed.
+"""
+import zlib
+
+from recipes.constants import BROTLI_QUALITY, GZIP_LEVEL
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def gzip_compressor():
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def brotli_compressor():
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    return compressor.process, compressor.finish
+
+
+# In order of preference when the client weighs them equally.
+COMPRESSORS = {'gzip': gzip_compressor}
+if brotli is not None:
+    COMPRESSORS = {'br': brotli_compressor, **COMPRESSORS}
+
+
+def parse_accept_encoding(header):
+    weights = {}
+    for item in header.split(','):
+        name, *params = item.split(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    return weights
+
+
+def negotiate_encoding(header):
+    """The best encoding ``header`` accepts, or None for identity."""
+    weights = parse_accept_encoding(header)
+    best, best_weight = None, 0.0
+    for encoding in COMPRESSORS:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(data, encoding):
+    process, finish = COMPRESSORS[encoding]()
+    return process(data) + finish()
+
+
+def compress_stream(chunks, encoding):
+    process, finish = COMPRESSORS[encoding]()
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
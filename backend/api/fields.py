@@ -0,0 +1,27 @@
+from uuid import uuid4
+
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+from .uploads import image_header_error, image_size_error
+
+
+class RecipeImageField(Base64ImageField):
+    """Image given either as a base64 string or as a multipart upload."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            extension = data.name.rsplit('.', 1)[-1].lower()
+            data.name = f'{uuid4()}.{extension}'
+            image = serializers.ImageField.to_internal_value(self, data)
+        else:
+            image = super().to_internal_value(data)
+        if image is None:
+            return image
+        error = image_size_error(image.size) or image_header_error(
+            image.image.format, image.image.size,
+        )
+        if error is not None:
+            raise serializers.ValidationError(error)
+        return image
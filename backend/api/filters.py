@@ -1,23 +1,50 @@
+from django import forms
+from django.db.models import Exists, OuterRef
+from django.utils.translation import gettext_lazy as _
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe, Tag
+from recipes.models import Recipe
+from recipes.search import search_recipes
+
+
+class SlugListField(forms.MultipleChoiceField):
+    def valid_value(self, value):
+        return True
+
+
+class SlugListFilter(filters.MultipleChoiceFilter):
+    field_class = SlugListField
 
 
 class RecipeFilter(FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        queryset=Tag.objects.all(),
-        to_field_name='slug',
-    )
+    tags = SlugListFilter(method='filter_tags')
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', _('popular')),),
+        method='filter_ordering',
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'author', 'is_favorited', 'is_in_shopping_cart',
+            'search', 'ordering',
+        )
+
+    def filter_tags(self, queryset, name, value):
+        slugs = [slug for slug in value if slug]
+        if not slugs:
+            return queryset
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'), tag__slug__in=slugs,
+            )
+        ))
 
     def filter_is_favorited(self, queryset, name, value):
         if not value:
@@ -33,6 +60,15 @@ class RecipeFilter(FilterSet):
             return Recipe.objects.none()
         return queryset.filter(shoppingcart__user=self.request.user)
 
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        return search_recipes(queryset, value)
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by('-favorites_count', '-id')
+
 
 class IngredientSearchFilter(SearchFilter):
     search_param = 'name'
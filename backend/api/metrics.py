@@ -0,0 +1,143 @@
+"""Per-route request metrics in the Prometheus text exposition format.
+
+Numbers are kept in process memory, so every worker process reports its
+own series; aggregate them in Prometheus with ``sum by (route)``.
+"""
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from recipes.constants import METRICS_LATENCY_BUCKETS
+
+LABELS = ('route', 'method', 'status')
+COUNTERS = (
+    ('foodgram_sql_queries_total', 'SQL queries run.'),
+    ('foodgram_sql_duration_seconds_total', 'Time spent in SQL queries.'),
+    ('foodgram_response_size_bytes_total', 'Response body bytes sent.'),
+)
+
+current_request = ContextVar('current_request', default=None)
+
+
+class RequestStats:
+    __slots__ = ('started', 'queries', 'sql_time')
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` counting queries of the request."""
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_time += perf_counter() - started
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class RouteMetrics:
+    __slots__ = ('buckets', 'count', 'latency', 'queries', 'sql_time', 'size')
+
+    def __init__(self, bucket_count):
+        self.buckets = [0] * bucket_count
+        self.count = 0
+        self.latency = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.size = 0
+
+
+def format_labels(labels):
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\').replace(
+            '"', r'\"').replace('\n', r'\n'))
+        for name, value in labels
+    )
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=METRICS_LATENCY_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.collectors = []
+
+    def add_collector(self, collector):
+        """Add a callable returning extra exposition lines."""
+        if collector not in self.collectors:
+            self.collectors.append(collector)
+
+    def get_route(self, key):
+        route = self.routes.get(key)
+        if route is None:
+            route = self.routes.setdefault(
+                key, RouteMetrics(len(self.bounds) + 1)
+            )
+        return route
+
+    def observe(self, key, stats, size):
+        latency = perf_counter() - stats.started
+        bucket = bisect_left(self.bounds, latency)
+        with self.lock:
+            route = self.get_route(key)
+            route.buckets[bucket] += 1
+            route.count += 1
+            route.latency += latency
+            route.queries += stats.queries
+            route.sql_time += stats.sql_time
+            route.size += size
+
+    def add_size(self, key, size):
+        with self.lock:
+            self.get_route(key).size += size
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+
+    def export(self):
+        with self.lock:
+            routes = [
+                (key, route.buckets[:], route.count, route.latency,
+                 route.queries, route.sql_time, route.size)
+                for key, route in sorted(self.routes.items())
+            ]
+        histogram = 'foodgram_request_duration_seconds'
+        lines = [
+            f'# HELP {histogram} Request latency.',
+            f'# TYPE {histogram} histogram',
+        ]
+        for key, buckets, count, latency, *_ in routes:
+            labels = list(zip(LABELS, key))
+            cumulative = 0
+            for bound, value in zip(self.bounds + ('+Inf',), buckets):
+                cumulative += value
+                le = format_labels(labels + [('le', bound)])
+                lines.append(f'{histogram}_bucket{{{le}}} {cumulative}')
+            labels = format_labels(labels)
+            lines.append(f'{histogram}_sum{{{labels}}} {latency!r}')
+            lines.append(f'{histogram}_count{{{labels}}} {count}')
+        for index, (name, help_text) in enumerate(COUNTERS, start=4):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for route in routes:
+                labels = format_labels(zip(LABELS, route[0]))
+                lines.append(f'{name}{{{labels}}} {route[index]!r}')
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,123 @@
+import asyncio
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+
+from recipes.constants import COMPRESSIBLE_TYPES, COMPRESSION_MIN_SIZE
+from .compression import compress, compress_stream, negotiate_encoding
+from .metrics import (RequestStats, current_request, install_query_recorder,
+                      metrics)
+
+
+def route_key(request, response):
+    match = getattr(request, 'resolver_match', None)
+    route = match.view_name if match is not None else 'unmatched'
+    return route, request.method, f'{response.status_code // 100}xx'
+
+
+def count_streamed(content, key):
+    size = 0
+    try:
+        for chunk in content:
+            size += len(chunk)
+            yield chunk
+    finally:
+        metrics.add_size(key, size)
+
+
+def observe(request, response, stats):
+    key = route_key(request, response)
+    if response.streaming:
+        metrics.observe(key, stats, 0)
+        response.streaming_content = count_streamed(
+            response.streaming_content, key,
+        )
+    else:
+        metrics.observe(key, stats, len(response.content))
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Record latency, SQL queries and response size per resolved route.
+
+    Queries are counted by an execute wrapper on every connection, so
+    reads served from the async pool threads are attributed as well.
+    """
+    connection_created.connect(install_query_recorder)
+    for connection in connections.all():
+        install_query_recorder(connection)
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            stats = RequestStats()
+            token = current_request.set(stats)
+            try:
+                response = await get_response(request)
+            finally:
+                current_request.reset(token)
+            observe(request, response, stats)
+            return response
+    else:
+        def middleware(request):
+            stats = RequestStats()
+            token = current_request.set(stats)
+            try:
+                response = get_response(request)
+            finally:
+                current_request.reset(token)
+            observe(request, response, stats)
+            return response
+    return middleware
+
+
+def compressible(response):
+    return (
+        not response.has_header('Content-Encoding')
+        and response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+        and 'no-transform' not in response.get('Cache-Control', '')
+        and (response.streaming or len(response.content)
+             >= COMPRESSION_MIN_SIZE)
+    )
+
+
+def compress_response(request, response):
+    if not compressible(response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding is None:
+        return response
+    if response.streaming:
+        response.streaming_content = compress_stream(
+            response.streaming_content, encoding,
+        )
+        del response['Content-Length']
+    else:
+        content = compress(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    response['Content-Encoding'] = encoding
+    return response
+
+
+@sync_and_async_middleware
+def compression_middleware(get_response):
+    """Compress text and JSON responses with the best accepted encoding.
+
+    Bodies under COMPRESSION_MIN_SIZE are sent as they are; streaming
+    responses (shopping list downloads) are compressed as they stream.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            return compress_response(request, await get_response(request))
+    else:
+        def middleware(request):
+            return compress_response(request, get_response(request))
+    return middleware
@@ -0,0 +1,28 @@
+import codecs
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, fast_json
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that decodes UTF-8 bodies with orjson when available.
+
+    Bodies orjson rejects are parsed again by the standard library, so
+    errors and edge cases (huge integers) behave as in JSONParser.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get(
+            'encoding', settings.DEFAULT_CHARSET,
+        )
+        if fast_json is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return fast_json.loads(body)
+        except fast_json.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -0,0 +1,58 @@
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+fast_json = orjson if settings.JSON_BACKEND == 'orjson' else None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is available.
+
+    Output is the compact form JSONRenderer produces. Indented output and
+    anything orjson refuses (non-string keys, huge integers) go through
+    the standard library.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (fast_json is None or data is None or not self.compact
+                or self.ensure_ascii or self.get_indent(
+                    accepted_media_type, renderer_context or {},
+                ) is not None):
+            return super().render(
+                data, accepted_media_type, renderer_context,
+            )
+        try:
+            ret = fast_json.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=fast_json.OPT_PASSTHROUGH_DATETIME,
+            )
+        except fast_json.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context,
+            )
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029',
+            )
+        return ret
+
+
+class PlainTextRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return str(data).encode(self.charset)
+
+
+class CSVRenderer(PlainTextRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
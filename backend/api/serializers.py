@@ -1,16 +1,18 @@
 from django.db import transaction
 from django.utils.translation import gettext_lazy as _
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from recipes.constants import INGREDIENT_MIN_AMOUNT
+from recipes import batch, shopping_list
+from recipes.documents import refresh_documents
+from recipes.constants import INGREDIENT_MIN_AMOUNT, RECIPES_BATCH_LIMIT
 from recipes.models import (
     Favorite, Ingredient, Recipe,
     RecipeIngredients, ShoppingCart, Tag,
 )
 from users.serializers import SubscribedUserSerializer
-from .shared_serializers import ShortRecipeSerializer
+from .fields import RecipeImageField
+from .shared_serializers import RenditionsField, ShortRecipeSerializer
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -38,6 +40,8 @@ class RecipeIngredientsSerializer(serializers.ModelSerializer):
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+
     class Meta:
         model = Favorite
         fields = ('user', 'recipe')
@@ -48,17 +52,17 @@ class FavoriteSerializer(serializers.ModelSerializer):
             instance.recipe, context={'request': request}
         ).data
 
-    def validate(self, data):
-        user = data['user']
-        recipe = data['recipe']
-        if Favorite.objects.filter(user=user, recipe=recipe).exists():
+    def create(self, validated_data):
+        if not batch.add_recipe(Favorite, **validated_data):
             raise serializers.ValidationError(
                 {'status': _('the recipe is already in favorites')}
             )
-        return data
+        return Favorite(**validated_data)
 
 
 class ShoppingCartSerializer(serializers.ModelSerializer):
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+
     class Meta:
         model = ShoppingCart
         fields = ('user', 'recipe')
@@ -69,14 +73,20 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
             instance.recipe, context={'request': request}
         ).data
 
-    def validate(self, data):
-        user = data['user']
-        recipe = data['recipe']
-        if ShoppingCart.objects.filter(user=user, recipe=recipe).exists():
+    def create(self, validated_data):
+        if not batch.add_recipe(ShoppingCart, **validated_data):
             raise serializers.ValidationError(
                 {'status': _('the recipe is already in shopping cart')}
             )
-        return data
+        return ShoppingCart(**validated_data)
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=RECIPES_BATCH_LIMIT,
+    )
 
 
 class RecipeReadSerializer(serializers.ModelSerializer):
@@ -85,10 +95,15 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    renditions = RenditionsField()
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        fields = (
+            'id', 'author', 'tags', 'ingredients', 'is_favorited',
+            'is_in_shopping_cart', 'renditions', 'name', 'image', 'text',
+            'cooking_time', 'favorites_count',
+        )
         read_only_fields = (
             'id', 'author', 'name', 'ingredients', 'is_favorited',
             'is_in_shopping_cart', 'image', 'tags', 'text', 'cooking_time',
@@ -99,6 +114,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         return RecipeIngredientsSerializer(ingredients, many=True).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -107,6 +124,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         ).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -114,6 +133,11 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             user=request.user, recipe=obj,
         ).exists()
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'is_subscribed'):
+            instance.author.is_subscribed = instance.is_subscribed
+        return super().to_representation(instance)
+
 
 class IngredientWriteSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(write_only=True)
@@ -129,7 +153,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         queryset=Tag.objects.all(), many=True
     )
     ingredients = IngredientWriteSerializer(many=True)
-    image = Base64ImageField(max_length=None, use_url=True)
+    image = RecipeImageField(max_length=None, use_url=True)
 
     class Meta:
         model = Recipe
@@ -138,17 +162,47 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         )
 
     def create_ingredients(self, ingredients, recipe):
-        for ingredient in ingredients:
-            amount = ingredient.get('amount')
-            ingredient_object = Ingredient.objects.get(id=ingredient.get('id'))
-            recipe.ingredients.add(
-                ingredient_object,
-                through_defaults={'amount': amount}
+        RecipeIngredients.objects.bulk_create(
+            RecipeIngredients(
+                recipe=recipe,
+                ingredient_id=ingredient['id'],
+                amount=ingredient['amount'],
             )
+            for ingredient in ingredients
+        )
+
+    def update_ingredients(self, ingredients, recipe):
+        current = {
+            row.ingredient_id: row
+            for row in RecipeIngredients.objects.filter(recipe=recipe)
+        }
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        old_amounts = {pk: row.amount for pk, row in current.items()}
+        removed = [
+            row.pk for pk, row in current.items() if pk not in amounts
+        ]
+        if removed:
+            RecipeIngredients.objects.filter(pk__in=removed).delete()
+        changed = []
+        for pk, row in current.items():
+            if pk in amounts and row.amount != amounts[pk]:
+                row.amount = amounts[pk]
+                changed.append(row)
+        RecipeIngredients.objects.bulk_update(changed, ('amount',))
+        self.create_ingredients(
+            [
+                ingredient for ingredient in ingredients
+                if ingredient['id'] not in current
+            ],
+            recipe,
+        )
+        shopping_list.change_recipe(recipe, old_amounts, amounts)
 
     def create_tags(self, tags, recipe):
-        for tag in tags:
-            recipe.tags.add(tag)
+        recipe.tags.set(tags)
 
     def create(self, validated_data):
         tags = validated_data.pop('tags')
@@ -157,6 +211,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             recipe = Recipe.objects.create(**validated_data)
             self.create_tags(tags, recipe)
             self.create_ingredients(ingredients, recipe)
+            refresh_documents([recipe.pk])
         return recipe
 
     def update(self, instance, validated_data):
@@ -167,17 +222,22 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             'cooking_time',
             instance.cooking_time,
         )
-        instance.tags.clear()
         tags = validated_data.get('tags')
         with transaction.atomic():
             self.create_tags(tags, instance)
-            RecipeIngredients.objects.filter(recipe=instance).all().delete()
             ingredients = validated_data.get('ingredients')
-            self.create_ingredients(ingredients, instance)
-            instance.save()
+            self.update_ingredients(ingredients, instance)
+            instance.save(
+                update_fields=('name', 'text', 'image', 'cooking_time'),
+            )
+            refresh_documents([instance.pk])
         return instance
 
     def to_representation(self, instance):
+        request = self.context.get('request')
+        instance = Recipe.objects.with_related().with_user_flags(
+            request.user
+        ).get(pk=instance.pk)
         return RecipeReadSerializer(instance, context=self.context).data
 
     def validate(self, data):
@@ -197,4 +257,14 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             ingredients.append(ingredient['id'])
         if len(ingredients) > len(set(ingredients)):
             raise ValidationError(_('Ingredients must be not identical'))
+        missing = set(ingredients) - set(
+            Ingredient.objects.filter(id__in=ingredients).values_list(
+                'id', flat=True,
+            )
+        )
+        if missing:
+            raise ValidationError(
+                _('Ingredients do not exist: ')
+                + ', '.join(str(pk) for pk in sorted(missing))
+            )
         return data
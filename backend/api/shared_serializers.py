@@ -1,10 +1,23 @@
 from rest_framework import serializers
 
 from recipes.models import Recipe
+from recipes.renditions import rendition_urls
+
+
+class RenditionsField(serializers.Field):
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        return rendition_urls(recipe, self.context.get('request'))
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    renditions = RenditionsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'renditions', 'cooking_time')
         read_only_fields = ('id', 'name', 'image', 'cooking_time')
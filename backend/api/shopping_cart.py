@@ -0,0 +1,48 @@
+import csv
+import json
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def shopping_cart_txt(ingredients, title):
+    yield f'{title}\n'
+    for ingredient in ingredients:
+        yield (
+            f'{ingredient["ingredient__name"]} - '
+            + f'{ingredient["total_amount"]}'
+            + f'{ingredient["ingredient__measurement_unit"]}.'
+            + '\n'
+        )
+
+
+def shopping_cart_csv(ingredients, title):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['total_amount'],
+            ingredient['ingredient__measurement_unit'],
+        ))
+
+
+def shopping_cart_json(ingredients, title):
+    separator = '['
+    for ingredient in ingredients:
+        yield separator + json.dumps({
+            'name': ingredient['ingredient__name'],
+            'amount': ingredient['total_amount'],
+            'measurement_unit': ingredient['ingredient__measurement_unit'],
+        }, ensure_ascii=False)
+        separator = ','
+    yield '[]' if separator == '[' else ']'
+
+
+SHOPPING_CART_FORMATS = {
+    'txt': ('text/plain; charset=utf-8', shopping_cart_txt),
+    'csv': ('text/csv; charset=utf-8', shopping_cart_csv),
+    'json': ('application/json', shopping_cart_json),
+}
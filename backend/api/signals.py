@@ -0,0 +1,28 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.documents import documents_refreshed
+from recipes.models import Ingredient, Recipe, Tag
+from .cache import bump_data_version
+
+
+# Versions are bumped after commit, so that a response rendered under the
+# new version can not have read the rows as they were before the write.
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_version(sender, **kwargs):
+    transaction.on_commit(partial(bump_data_version, 'tags'))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_ingredients_version(sender, **kwargs):
+    transaction.on_commit(partial(bump_data_version, 'ingredients'))
+
+
+@receiver(documents_refreshed)
+@receiver(post_delete, sender=Recipe)
+def bump_recipes_version(sender, **kwargs):
+    transaction.on_commit(partial(bump_data_version, 'recipes'))
@@ -0,0 +1,302 @@
+from asgiref.sync import async_to_sync
+import json
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from recipes.counters import stale_favorites_counts
+from recipes.documents import refresh_documents
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredients,
+                            ShoppingCart, Tag)
+from recipes.shopping_list import expected_totals, stored_totals
+from users.models import Follow, User
+from .async_views import AsyncStreamingHttpResponse
+from .cache import PageCache, bump_data_version
+from .compiled_serializers import recipe_rows, serialize_recipes
+from .serializers import RecipeReadSerializer
+
+
+class RecipeFixturesMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Author', last_name='Example', password='pass-12345',
+        )
+        cls.reader = User.objects.create_user(
+            email='reader@example.com', username='reader',
+            first_name='Reader', last_name='Example', password='pass-12345',
+        )
+        cls.tags = [
+            Tag.objects.create(name=name, color='#FF0000')
+            for name in ('breakfast', 'lunch', 'dinner')
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=f'ingredient {i}',
+                                      measurement_unit='g')
+            for i in range(5)
+        ]
+        cls.recipes = []
+        for i in range(12):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=f'recipe {i}', text='text',
+                image=f'recipes/{i}.png', cooking_time=10 + i,
+            )
+            recipe.tags.set(cls.tags[:1 + i % 3])
+            RecipeIngredients.objects.bulk_create(
+                RecipeIngredients(
+                    recipe=recipe, ingredient=ingredient, amount=j + 1,
+                )
+                for j, ingredient in enumerate(cls.ingredients[:1 + i % 5])
+            )
+            cls.recipes.append(recipe)
+
+
+class RecipeListQueriesTest(RecipeFixturesMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        for limit in (2, 10):
+            with self.subTest(limit=limit), self.assertNumQueries(5):
+                response = self.client.get(
+                    '/api/recipes/', {'limit': limit},
+                )
+                self.assertEqual(len(response.json()['results']), limit)
+
+
+class CompiledSerializerTest(RecipeFixturesMixin, TestCase):
+    """serialize_recipes must match RecipeReadSerializer exactly."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Favorite.objects.create(user=cls.reader, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.reader, recipe=cls.recipes[1])
+        Follow.objects.create(follower=cls.reader, following=cls.author)
+        # Half of the recipes have stored documents, the rest are built
+        # on the fly.
+        refresh_documents(recipe.pk for recipe in cls.recipes[::2])
+
+    def assert_same_output(self, user):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        queryset = Recipe.objects.with_related().with_user_flags(user)
+        # Rendered, so that the field order is compared as well.
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(serialize_recipes(recipe_rows(queryset), request)),
+            renderer.render(RecipeReadSerializer(
+                queryset, many=True, context={'request': request},
+            ).data),
+        )
+
+    def test_anonymous_reader(self):
+        self.assert_same_output(AnonymousUser())
+
+    def test_authenticated_reader(self):
+        self.assert_same_output(self.reader)
+
+
+class PageCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.page_cache = PageCache(
+            'test', timeout=60, stale_timeout=600, lock_timeout=0.1,
+        )
+
+    def hold_lock(self, key):
+        cache.add(f'page:test:{key}:lock', True, 60)
+
+    def test_uncacheable_render_drops_entry(self):
+        self.page_cache.get_or_render('page', lambda: b'{}')
+        bump_data_version('test')
+        self.assertIsNone(self.page_cache.get_or_render('page', lambda: None))
+        self.assertIsNone(cache.get('page:test:page'))
+
+    def test_older_version_served_only_when_allowed(self):
+        self.page_cache.get_or_render('page', lambda: b'old')
+        bump_data_version('test')
+        self.hold_lock('page')
+        self.assertEqual(
+            self.page_cache.get_or_render('page', lambda: b'new')[None],
+            b'old',
+        )
+        self.assertEqual(
+            self.page_cache.get_or_render(
+                'page', lambda: b'new', stale_versions=False,
+            )[None],
+            b'new',
+        )
+
+
+class FavoriteAndCartListsTest(RecipeFixturesMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+        self.ids = [recipe.pk for recipe in self.recipes[:4]]
+
+    def assert_consistent(self):
+        self.assertFalse(stale_favorites_counts().exists())
+        self.assertEqual(stored_totals(), expected_totals())
+
+    def test_toggles_keep_counters_and_totals(self):
+        for path in ('favorite', 'shopping_cart'):
+            with self.subTest(path=path):
+                self.client.post(f'/api/recipes/{self.ids[0]}/{path}/')
+                response = self.client.post(
+                    f'/api/recipes/{path}/', {'recipes': self.ids},
+                    format='json',
+                )
+                self.assertEqual(response.json()['existing'], self.ids[:1])
+                self.assert_consistent()
+                response = self.client.delete(
+                    f'/api/recipes/{self.ids[1]}/{path}/',
+                )
+                self.assertEqual(response.status_code, 204)
+                response = self.client.delete(
+                    f'/api/recipes/{path}/', {'recipes': self.ids},
+                    format='json',
+                )
+                self.assertEqual(response.json()['absent'], self.ids[1:2])
+                self.assert_consistent()
+
+    def test_single_toggles_are_single_statements(self):
+        path = f'/api/recipes/{self.ids[0]}/favorite/'
+        # Recipe lookup, savepoint, INSERT, counter UPDATE, release.
+        with self.assertNumQueries(5):
+            self.assertEqual(self.client.post(path).status_code, 200)
+        self.assertEqual(self.client.post(path).status_code, 400)
+        # Savepoint, DELETE ... RETURNING, counter UPDATE, release.
+        with self.assertNumQueries(4):
+            self.assertEqual(self.client.delete(path).status_code, 204)
+        self.assertEqual(self.client.delete(path).status_code, 400)
+        self.assert_consistent()
+
+    def test_batch_query_count_does_not_grow(self):
+        small = [recipe.pk for recipe in self.recipes[:2]]
+        large = [recipe.pk for recipe in self.recipes[2:12]]
+        for path in ('favorite', 'shopping_cart'):
+            for method in ('post', 'delete'):
+                counts = []
+                for ids in (small, large):
+                    with CaptureQueriesContext(connection) as queries:
+                        getattr(self.client, method)(
+                            f'/api/recipes/{path}/', {'recipes': ids},
+                            format='json',
+                        )
+                    counts.append(len(queries))
+                with self.subTest(path=path, method=method):
+                    self.assertEqual(counts[0], counts[1])
+        self.assert_consistent()
+
+
+class CachedTokenUserTest(RecipeFixturesMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        token = Token.objects.create(user=self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        # Caches the token with the user as it is now.
+        self.client.get('/api/users/me/')
+
+    def test_password_change_keeps_recipes_count(self):
+        Recipe.objects.create(
+            author=self.author, name='new', text='text',
+            image='recipes/new.png', cooking_time=5,
+        )
+        response = self.client.post('/api/users/set_password/', {
+            'current_password': 'pass-12345',
+            'new_password': 'Another-pass-678',
+        })
+        self.assertEqual(response.status_code, 204)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, len(self.recipes) + 1)
+
+
+class AsyncStreamingResponseTest(SimpleTestCase):
+    def test_async_iteration_streams_the_same_chunks(self):
+        async def collect(response):
+            return [chunk async for chunk in response]
+
+        response = AsyncStreamingHttpResponse(iter(['first\n', 'second\n']))
+        self.assertEqual(
+            async_to_sync(collect)(response), [b'first\n', b'second\n'],
+        )
+
+
+def png_upload(name='photo.png', size=(40, 30)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 10, 10)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+class MultipartRecipeUploadTest(RecipeFixturesMixin, TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def recipe_data(self, image):
+        return {
+            'name': 'uploaded', 'text': 'text', 'cooking_time': 5,
+            'ingredients': json.dumps([
+                {'id': self.ingredients[0].pk, 'amount': 2},
+            ]),
+            'tags': [tag.pk for tag in self.tags[:2]],
+            'image': image,
+        }
+
+    def create(self, image):
+        return self.client.post(
+            '/api/recipes/', self.recipe_data(image), format='multipart',
+        )
+
+    def test_valid_upload(self):
+        response = self.create(png_upload())
+        self.assertEqual(response.status_code, 201, response.content)
+        recipe = Recipe.objects.get(pk=response.json()['id'])
+        self.assertTrue(recipe.image.name.endswith('.png'))
+        self.assertEqual(recipe.image.width, 40)
+        response = self.client.patch(
+            f'/api/recipes/{recipe.pk}/',
+            {**self.recipe_data(png_upload(size=(20, 10))), 'name': 'new'},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        recipe.refresh_from_db()
+        self.assertEqual((recipe.name, recipe.image.width), ('new', 20))
+
+    def test_repeated_tags_fields(self):
+        response = self.create(png_upload())
+        self.assertEqual(
+            sorted(tag['id'] for tag in response.json()['tags']),
+            sorted(tag.pk for tag in self.tags[:2]),
+        )
+
+    def test_invalid_image(self):
+        image = SimpleUploadedFile('photo.png', b'not an image' * 100)
+        response = self.create(image)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.json())
+
+    def test_file_without_extension(self):
+        response = self.create(png_upload(name='photo'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.json())
@@ -0,0 +1,118 @@
+import json
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext_lazy as _
+from PIL import ImageFile
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+from recipes.constants import (RECIPE_IMAGE_FORMATS,
+                               RECIPE_IMAGE_HEADER_LIMIT,
+                               RECIPE_IMAGE_MAX_DIMENSION,
+                               RECIPE_IMAGE_MAX_SIZE)
+
+
+def image_size_error(size):
+    if size > RECIPE_IMAGE_MAX_SIZE:
+        return (
+            _('Image size must not exceed ')
+            + f'{RECIPE_IMAGE_MAX_SIZE // (1024 * 1024)}MB'
+        )
+    return None
+
+
+def image_header_error(image_format, dimensions):
+    if image_format not in RECIPE_IMAGE_FORMATS:
+        return _('Unsupported image format')
+    if max(dimensions) > RECIPE_IMAGE_MAX_DIMENSION:
+        return (
+            _('Image dimensions must not exceed ')
+            + f'{RECIPE_IMAGE_MAX_DIMENSION}px'
+        )
+    return None
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Spool uploaded images to disk, validating them while they arrive.
+
+    The size limit is enforced per chunk and the format and dimensions
+    are checked as soon as Pillow has parsed the image header, so an
+    oversized or bogus upload is rejected without reading it to the end.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header_parser = ImageFile.Parser()
+        self.received = 0
+
+    def reject(self, message):
+        self.upload_interrupted()
+        raise ValidationError({self.field_name: [message]})
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        error = image_size_error(self.received)
+        if error is None and self.header_parser is not None:
+            error = self.parse_header(raw_data)
+        if error is not None:
+            self.reject(error)
+        return super().receive_data_chunk(raw_data, start)
+
+    def parse_header(self, raw_data):
+        self.header_parser.feed(raw_data)
+        image = self.header_parser.image
+        if image is not None:
+            self.header_parser = None
+            return image_header_error(image.format, image.size)
+        if self.received > RECIPE_IMAGE_HEADER_LIMIT:
+            return _('Upload a valid image')
+        return None
+
+    def file_complete(self, file_size):
+        if self.header_parser is not None:
+            self.reject(_('Upload a valid image'))
+        return super().file_complete(file_size)
+
+
+class UploadedFiles(dict):
+    """One upload per field, closable by ``HttpRequest.close()``.
+
+    DRF hands the parsed files to the Django request, whose ``close()``
+    expects a MultiValueDict's ``lists()``; a plain dict left the
+    temporary upload files open.
+    """
+
+    def lists(self):
+        return ((key, [file]) for key, file in self.items())
+
+
+class JSONFieldsMultiPartParser(MultiPartParser):
+    """Multipart parser accepting nested fields as JSON-encoded strings.
+
+    ``tags`` may also be sent as repeated form fields.
+    """
+    json_fields = ('ingredients', 'tags')
+    list_fields = ('tags',)
+
+    def parse_value(self, key, values):
+        if key in self.json_fields and len(values) == 1:
+            try:
+                value = json.loads(values[0])
+            except ValueError as exc:
+                raise ParseError(f'{key}: JSON parse error - {exc}')
+            if key in self.list_fields and not isinstance(value, list):
+                value = [value]
+            return value
+        if key in self.list_fields or len(values) > 1:
+            return values
+        return values[0]
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parsed = super().parse(stream, media_type, parser_context)
+        data = {
+            key: self.parse_value(key, values)
+            for key, values in parsed.data.lists()
+        }
+        files = UploadedFiles(parsed.files.dict())
+        data.update(files)
+        return DataAndFiles(data, files)
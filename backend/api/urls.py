@@ -1,7 +1,15 @@
-from django.urls import include, path
+from django.urls import URLPattern, include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+from .async_views import async_read_view
+from .views import (IngredientViewSet, MetricsView, RecipeViewSet,
+                    TagViewSet)
+
+ASYNC_READ_ROUTES = (
+    'recipes-list', 'recipes-detail',
+    'ingredients-list', 'ingredients-detail',
+    'tags-list', 'tags-detail',
+)
 
 router = DefaultRouter()
 router.register('ingredients', IngredientViewSet, basename='ingredients')
@@ -9,5 +17,19 @@ router.register('tags', TagViewSet, basename='tags')
 router.register('recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
 ]
+
+# Served by foodgram.asgi in front of urlpatterns. All router patterns are
+# kept, in order, so that e.g. recipes/download_shopping_cart/ is not
+# taken for a recipes-detail pk.
+async_urlpatterns = [
+    URLPattern(
+        pattern.pattern,
+        async_read_view(pattern.callback),
+        pattern.default_args,
+        pattern.name,
+    ) if pattern.name in ASYNC_READ_ROUTES else pattern
+    for pattern in router.urls
+]
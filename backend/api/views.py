@@ -1,25 +1,41 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import F
 from django.utils.translation import gettext_lazy as _
 from rest_framework import viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import (SAFE_METHODS, AllowAny, IsAdminUser,
+                                        IsAuthenticated)
 from rest_framework.response import Response
 from rest_framework.status import HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
+from recipes import batch
+from recipes.constants import SHOPPING_CART_CHUNK_SIZE
+from recipes.ingredient_index import ingredient_index
 from recipes.models import (
     Favorite, Ingredient, Recipe,
-    RecipeIngredients, ShoppingCart, Tag
+    ShoppingCart, ShoppingCartIngredient, Tag
 )
+from users.pagination import OptionalCursorPagination
+from .async_views import AsyncStreamingHttpResponse
+from .cache import CachedListMixin, cache_anonymous_page
+from .compiled_serializers import recipe_rows, serialize_recipes
 from .filters import IngredientSearchFilter, RecipeFilter
+from .metrics import metrics
+from .parsers import FastJSONParser
 from .permissions import IsAuthorOrReadOnly
+from .renderers import CSVRenderer, FastJSONRenderer, PlainTextRenderer
 from .serializers import (FavoriteSerializer, IngredientSerializer,
-                          RecipeReadSerializer, RecipeWriteSerializer,
-                          ShoppingCartSerializer, TagSerializer)
+                          RecipeIdsSerializer, RecipeReadSerializer,
+                          RecipeWriteSerializer, ShoppingCartSerializer,
+                          TagSerializer)
+from .shopping_cart import SHOPPING_CART_FORMATS
+from .uploads import ImageUploadHandler, JSONFieldsMultiPartParser
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
+    cache_data_name = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AllowAny,)
@@ -27,8 +43,17 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ('^name',)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(IngredientSearchFilter.search_param)
+        if not name:
+            return super().list(request, *args, **kwargs)
+        ingredients = ingredient_index.search(name.strip())
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
+
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
+    cache_data_name = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
@@ -36,29 +61,103 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrReadOnly,)
     http_method_names = ('get', 'post', 'patch', 'delete')
     filterset_class = RecipeFilter
+    pagination_class = OptionalCursorPagination
+    parser_classes = (FastJSONParser, JSONFieldsMultiPartParser)
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [ImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return Recipe.objects.with_related().with_user_flags(
+            self.request.user
+        )
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
+    @cache_anonymous_page
+    def list(self, request, *args, **kwargs):
+        rows = recipe_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(serialize_recipes(rows, request))
+        return self.get_paginated_response(serialize_recipes(page, request))
+
+    @cache_anonymous_page
+    def retrieve(self, request, *args, **kwargs):
+        rows = recipe_rows(self.filter_queryset(self.get_queryset()))
+        row = get_object_or_404(rows, pk=kwargs[self.lookup_field])
+        self.check_object_permissions(request, row)
+        return Response(serialize_recipes([row], request)[0])
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def batch_add(self, request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        added, existing, missing = batch.add_recipes(
+            model, request.user, serializer.validated_data['recipes'],
+        )
+        return Response({
+            'added': sorted(added),
+            'existing': sorted(existing),
+            'missing': sorted(missing),
+        })
+
+    def batch_remove(self, request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        removed, absent, missing = batch.remove_recipes(
+            model, request.user, serializer.validated_data['recipes'],
+        )
+        return Response({
+            'removed': sorted(removed),
+            'absent': sorted(absent),
+            'missing': sorted(missing),
+        })
+
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        methods=('post',),
+        url_path='favorite',
+        url_name='favorite-batch',
+    )
+    def favorite_batch(self, request):
+        return self.batch_add(request, Favorite)
+
+    @favorite_batch.mapping.delete
+    def delete_favorite_batch(self, request):
+        return self.batch_remove(request, Favorite)
+
+    @action(
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        methods=('post',),
+        url_path='shopping_cart',
+        url_name='shopping-cart-batch',
+    )
+    def shopping_cart_batch(self, request):
+        return self.batch_add(request, ShoppingCart)
+
+    @shopping_cart_batch.mapping.delete
+    def delete_shopping_cart_batch(self, request):
+        return self.batch_remove(request, ShoppingCart)
+
     @action(
         detail=True,
         permission_classes=(IsAuthenticated,),
         methods=('post',)
     )
     def favorite(self, request, pk):
-        data = {
-            'user': request.user.id,
-            'recipe': pk,
-        }
+        data = {'recipe': pk}
         serializer = FavoriteSerializer(
             data=data,
             context={'request': request},
@@ -69,15 +168,11 @@ class RecipeViewSet(ModelViewSet):
 
     @favorite.mapping.delete
     def delete_favorite(self, request, pk):
-        user = request.user
-        try:
-            favorite = Favorite.objects.get(user=user, recipe=pk)
-        except Favorite.DoesNotExist:
+        if not batch.remove_recipe(Favorite, request.user, pk):
             return Response(
                 {'error': _('the recipe is not in favorites')},
                 status=HTTP_400_BAD_REQUEST,
             )
-        favorite.delete()
         return Response(status=HTTP_204_NO_CONTENT)
 
     @action(
@@ -86,10 +181,7 @@ class RecipeViewSet(ModelViewSet):
         methods=('post',)
     )
     def shopping_cart(self, request, pk):
-        data = {
-            'user': request.user.id,
-            'recipe': pk,
-        }
+        data = {'recipe': pk}
         serializer = ShoppingCartSerializer(
             data=data,
             context={'request': request}
@@ -100,48 +192,45 @@ class RecipeViewSet(ModelViewSet):
 
     @shopping_cart.mapping.delete
     def delete_shopping_cart(self, request, pk):
-        user = request.user
-        try:
-            shopping_cart = ShoppingCart.objects.get(user=user, recipe=pk)
-        except ShoppingCart.DoesNotExist:
+        if not batch.remove_recipe(ShoppingCart, request.user, pk):
             return Response(
                 {'error': _('the recipe is not in shopping cart')},
                 status=HTTP_400_BAD_REQUEST,
             )
-        shopping_cart.delete()
         return Response(status=HTTP_204_NO_CONTENT)
 
-    def get_text_shopping_cart(self, ingredients):
-        shopping_cart = _('shopping cart:') + '\n'
-        for ingredient in ingredients:
-            shopping_cart += (
-                f'{ingredient["ingredient__name"]} - '
-                + f'{ingredient["total_amount"]}'
-                + f'{ingredient["ingredient__measurement_unit"]}.'
-                + '\n'
-            )
-        return shopping_cart
-
     @action(
         detail=False,
         permission_classes=(IsAuthenticated,),
-        methods=('get',)
+        methods=('get',),
+        renderer_classes=(FastJSONRenderer, PlainTextRenderer, CSVRenderer),
     )
     def download_shopping_cart(self, request):
         user = request.user
+        export_format = request.query_params.get('format', 'txt')
+        content_type, writer = SHOPPING_CART_FORMATS[export_format]
         values_list = ('ingredient__name', 'ingredient__measurement_unit')
-        ingredients = RecipeIngredients.objects.filter(
-            recipe__shoppingcart__user=user
-        ).values(*values_list).annotate(
-            total_amount=Sum('amount')
-        ).order_by(*values_list)
-
-        return HttpResponse(
-            self.get_text_shopping_cart(ingredients),
-            headers={
-                'Content-Type': 'text/plain',
-                'Content-Disposition': (
-                    'attachment; filename="shopping_cart.txt"'
-                ),
-            },
+        ingredients = ShoppingCartIngredient.objects.filter(
+            user=user
+        ).values(*values_list, total_amount=F('amount')).order_by(*values_list)
+
+        lines = writer(
+            ingredients.iterator(chunk_size=SHOPPING_CART_CHUNK_SIZE),
+            str(_('shopping cart:')),
         )
+        headers = {
+            'Content-Type': content_type,
+            'Content-Disposition': (
+                'attachment; '
+                + f'filename="shopping_cart.{export_format}"'
+            ),
+        }
+        return AsyncStreamingHttpResponse(lines, headers=headers)
+
+
+class MetricsView(APIView):
+    permission_classes = (IsAdminUser,)
+    renderer_classes = (PlainTextRenderer,)
+
+    def get(self, request):
+        return Response(metrics.export())
@@ -2,6 +2,10 @@
 ASGI config for foodgram project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are resolved with ``foodgram.asgi_urls``, which serves the hottest
+read endpoints with async views. The Docker image serves ``foodgram.wsgi``;
+this entry point is for running under an ASGI server, e.g.
+``uvicorn foodgram.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -9,8 +13,58 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
+
+class ReadPathASGIHandler(ASGIHandler):
+    urlconf = 'foodgram.asgi_urls'
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
+
+    async def send_response(self, response, send):
+        """Send responses with ``__aiter__`` by iterating it asynchronously.
+
+        Django 3.2 iterates streaming content in the event loop, where the
+        lazy query behind e.g. api.async_views.AsyncStreamingHttpResponse
+        can not run; Django 4.2 does the same for async iterators.
+        """
+        if not (response.streaming and hasattr(response, '__aiter__')):
+            return await super().send_response(response, send)
+        headers = [
+            (header.encode('ascii'), value.encode('latin1'))
+            for header, value in response.items()
+        ]
+        headers.extend(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+        async for part in response:
+            for chunk, _ in self.chunk_bytes(part):
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return ReadPathASGIHandler()
+
+
 application = get_asgi_application()
@@ -0,0 +1,13 @@
+"""URL configuration used by the ASGI entry point.
+
+The hottest read endpoints resolve to async views first; everything
+else falls through to the regular URL configuration.
+"""
+from django.urls import include, path
+
+from api.urls import async_urlpatterns
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/', include(async_urlpatterns)),
+] + sync_urlpatterns
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -52,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.metrics_middleware',
+    'api.middleware.compression_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +67,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'foodgram.urls'
 
+# Threads (and database connections) per ASGI worker for async reads.
+ASYNC_READ_WORKERS = int(os.getenv('ASYNC_READ_WORKERS', default=8))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -100,6 +106,32 @@ DATABASES = {
     }
 }
 
+# The data versions behind the cached API responses are only shared between
+# processes by a shared backend, e.g. PyMemcacheCache as in infra/; with the
+# per-process LocMemCache default, bumps made elsewhere (management commands,
+# other workers) show up only when RESPONSE_CACHE_TIMEOUT runs out.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+# 'orjson' renders and parses API JSON with orjson when it is installed;
+# 'json' always uses the standard library.
+JSON_BACKEND = os.getenv('JSON_BACKEND', default='orjson')
+
+# Token -> user lookups are cached in each process for TOKEN_CACHE_LOCAL_TTL
+# seconds and, if TOKEN_CACHE_ALIAS names a shared cache, there for
+# TOKEN_CACHE_TTL seconds.
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_LOCAL_TTL = int(os.getenv('TOKEN_CACHE_LOCAL_TTL', default=10))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', default=300))
+TOKEN_CACHE_ALIAS = os.getenv('TOKEN_CACHE_ALIAS')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -153,8 +185,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS':
         'users.pagination.LimitPageNumberPagination',
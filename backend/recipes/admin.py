@@ -1,10 +1,15 @@
+from contextlib import contextmanager
+
 from django.contrib import admin
 from django.contrib.admin import display
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 
+from . import shopping_list
+from .documents import refresh_documents
 from .models import (
     Favorite, Ingredient, Recipe,
-    RecipeIngredients, ShoppingCart, Tag
+    RecipeIngredients, ShoppingCart, ShoppingCartIngredient, Tag
 )
 
 
@@ -23,12 +28,25 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'author', 'recipe_favorite_count')
+    list_display = ('id', 'name', 'author', 'favorites_count')
     list_filter = ('author__email', 'name', 'tags__name')
     search_fields = ('author__email', 'name', 'tags__name')
+    readonly_fields = ('favorites_count',)
+
+    def save_model(self, request, obj, form, change):
+        # favorites_count and renditions are written by counters and the
+        # renditions worker meanwhile; save only what the form changed.
+        if not change:
+            return super().save_model(request, obj, form, change)
+        concrete = {
+            field.name for field in obj._meta.concrete_fields
+            if not field.primary_key
+        }
+        obj.save(update_fields=concrete & set(form.changed_data))
 
-    def recipe_favorite_count(self, obj):
-        return obj.favorite_set.count()
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        refresh_documents([form.instance.pk])
 
 
 @admin.register(RecipeIngredients)
@@ -40,6 +58,41 @@ class RecipeIngredientsAdmin(admin.ModelAdmin):
     list_filter = ('ingredient',)
     search_fields = ('ingredient__name', 'recipe__name')
 
+    @contextmanager
+    def changing_recipes(self, recipe_ids):
+        """Carry the amount changes made in the block into the shopping
+        lists and documents of ``recipe_ids``.
+        """
+        recipe_ids = set(recipe_ids)
+        with transaction.atomic():
+            old_amounts = {
+                pk: shopping_list.recipe_amounts(pk) for pk in recipe_ids
+            }
+            yield
+            for pk in recipe_ids:
+                shopping_list.change_recipe(
+                    pk, old_amounts[pk], shopping_list.recipe_amounts(pk),
+                )
+            refresh_documents(recipe_ids)
+
+    def save_model(self, request, obj, form, change):
+        recipe_ids = {obj.recipe_id}
+        if change:
+            recipe_ids.update(RecipeIngredients.objects.filter(
+                pk=obj.pk,
+            ).values_list('recipe_id', flat=True))
+        with self.changing_recipes(recipe_ids):
+            super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        with self.changing_recipes([obj.recipe_id]):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = queryset.values_list('recipe_id', flat=True)
+        with self.changing_recipes(recipe_ids):
+            super().delete_queryset(request, queryset)
+
     @display(description=_('measurement unit'))
     def get_measurement_unit(self, obj):
         return obj.ingredient.measurement_unit
@@ -57,3 +110,10 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
     list_filter = ('user', 'recipe')
     search_fields = ('user__email', 'recipe__name')
+
+
+@admin.register(ShoppingCartIngredient)
+class ShoppingCartIngredientAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'ingredient', 'amount')
+    list_filter = ('user',)
+    search_fields = ('user__email', 'ingredient__name')
@@ -0,0 +1,158 @@
+from django.db import connections, router, transaction
+
+from . import shopping_list
+from .counters import change_favorites_counts
+from .models import Favorite, Recipe, ShoppingCart
+
+
+def favorites_added(user_id, recipe_ids):
+    change_favorites_counts(recipe_ids, 1)
+
+
+def favorites_removed(user_id, recipe_ids):
+    change_favorites_counts(recipe_ids, -1)
+
+
+# The statements below bypass model signals, so what the recipes.signals
+# receivers do per row is done here for all affected recipes at once.
+SIDE_EFFECTS = {
+    Favorite: (favorites_added, favorites_removed),
+    ShoppingCart: (shopping_list.add_recipes, shopping_list.remove_recipes),
+}
+
+
+def insert_ignore(model, **values):
+    """Insert one row with INSERT ... ON CONFLICT DO NOTHING.
+
+    Values are keyed by field attname; returns whether a row was added.
+    """
+    connection = connections[router.db_for_write(model)]
+    fields = [model._meta.get_field(name) for name in values]
+    quote_name = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({}) ON CONFLICT DO NOTHING'.format(
+        quote_name(model._meta.db_table),
+        ', '.join(quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    params = [
+        field.get_db_prep_save(value, connection)
+        for field, value in zip(fields, values.values())
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount > 0
+
+
+def delete_recipes(model, user_id, recipe_ids):
+    """Delete the user's rows for ``recipe_ids`` in one DELETE.
+
+    Returns the set of recipe ids whose rows were deleted.
+    """
+    if not recipe_ids:
+        return set()
+    connection = connections[router.db_for_write(model)]
+    user = model._meta.get_field('user')
+    recipe = model._meta.get_field('recipe')
+    quote_name = connection.ops.quote_name
+    sql = 'DELETE FROM {} WHERE {} = %s AND {} IN ({}) RETURNING {}'.format(
+        quote_name(model._meta.db_table),
+        quote_name(user.column),
+        quote_name(recipe.column),
+        ', '.join(['%s'] * len(recipe_ids)),
+        quote_name(recipe.column),
+    )
+    params = [user.get_db_prep_value(user_id, connection)]
+    params.extend(
+        recipe.get_db_prep_value(pk, connection) for pk in recipe_ids
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {recipe_id for recipe_id, in cursor.fetchall()}
+
+
+def add_recipe(model, user, recipe):
+    """Add a recipe to a favorite/shopping cart list in one statement.
+
+    Returns False if the recipe was already there.
+    """
+    with transaction.atomic():
+        added = insert_ignore(model, user_id=user.pk, recipe_id=recipe.pk)
+        if added:
+            SIDE_EFFECTS[model][0](user.pk, [recipe.pk])
+    return added
+
+
+def remove_recipe(model, user, recipe_id):
+    """Remove a recipe from a favorite/shopping cart list in one DELETE.
+
+    Returns False if the recipe was not there.
+    """
+    with transaction.atomic():
+        removed = delete_recipes(model, user.pk, [recipe_id])
+        if removed:
+            SIDE_EFFECTS[model][1](user.pk, removed)
+    return bool(removed)
+
+
+def insert_recipes(model, user_id, recipe_ids):
+    """Add the user's rows for ``recipe_ids`` in one INSERT, skipping
+    those that exist; returns the set of recipe ids actually added.
+    """
+    if not recipe_ids:
+        return set()
+    connection = connections[router.db_for_write(model)]
+    user = model._meta.get_field('user')
+    recipe = model._meta.get_field('recipe')
+    quote_name = connection.ops.quote_name
+    sql = (
+        'INSERT INTO {} ({}, {}) VALUES {} '
+        'ON CONFLICT DO NOTHING RETURNING {}'
+    ).format(
+        quote_name(model._meta.db_table),
+        quote_name(user.column),
+        quote_name(recipe.column),
+        ', '.join(['(%s, %s)'] * len(recipe_ids)),
+        quote_name(recipe.column),
+    )
+    user_id = user.get_db_prep_value(user_id, connection)
+    params = []
+    for pk in recipe_ids:
+        params.extend((user_id, recipe.get_db_prep_value(pk, connection)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {recipe_id for recipe_id, in cursor.fetchall()}
+
+
+def existing_recipe_ids(recipe_ids):
+    return set(
+        Recipe.objects.filter(pk__in=recipe_ids).values_list('pk', flat=True)
+    )
+
+
+def add_recipes(model, user, recipe_ids):
+    """Add recipes to a favorite/shopping cart list in one INSERT.
+
+    Signals are bypassed, so counters and shopping list totals are
+    updated here in bulk for the rows the INSERT returned.
+    Returns (added, existing, missing) id sets.
+    """
+    found = existing_recipe_ids(recipe_ids)
+    with transaction.atomic():
+        added = insert_recipes(model, user.pk, found)
+        if added:
+            SIDE_EFFECTS[model][0](user.pk, added)
+    return added, found - added, set(recipe_ids) - found
+
+
+def remove_recipes(model, user, recipe_ids):
+    """Remove recipes from a favorite/shopping cart list in one DELETE.
+
+    Counters and shopping list totals are updated in bulk for the rows
+    the DELETE returned. Returns (removed, absent, missing) id sets.
+    """
+    found = existing_recipe_ids(recipe_ids)
+    with transaction.atomic():
+        removed = delete_recipes(model, user.pk, found)
+        if removed:
+            SIDE_EFFECTS[model][1](user.pk, removed)
+    return removed, found - removed, set(recipe_ids) - found
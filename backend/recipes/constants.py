@@ -8,3 +8,36 @@ COLOR_PALETTE = [
     ('#0074D9', 'blue'),
     ('#FFDC00', 'yellow'),
 ]
+INGREDIENT_SEARCH_LIMIT = 50
+INGREDIENT_INDEX_TTL = 300
+SHOPPING_CART_CHUNK_SIZE = 2000
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+RENDITION_SIZES = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+    'detail': (1200, 1200),
+}
+RENDITION_FORMATS = (('JPEG', 'jpg'), ('WEBP', 'webp'))
+RENDITION_QUALITY = 80
+RENDITION_WORKERS = 2
+RECIPE_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+RECIPE_IMAGE_MAX_DIMENSION = 8000
+RECIPE_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+RECIPE_IMAGE_HEADER_LIMIT = 1024 * 1024
+SEARCH_CONFIG = 'russian'
+RECIPES_BATCH_LIMIT = 100
+METRICS_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'image/svg+xml',
+)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+DOCUMENT_BATCH_SIZE = 500
+ANONYMOUS_PAGE_PARAMS = ('tags', 'author', 'page', 'limit')
+ANONYMOUS_PAGE_CACHE_TIMEOUT = 60
+ANONYMOUS_PAGE_STALE_TIMEOUT = 60 * 10
+PAGE_CACHE_LOCK_TIMEOUT = 5
+PAGE_CACHE_POLL_INTERVAL = 0.02
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Favorite, Recipe
+
+User = get_user_model()
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+                field,
+            ).annotate(count=Count('pk')).values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def change_favorites_count(recipe_id, delta):
+    change_favorites_counts((recipe_id,), delta)
+
+
+def change_favorites_counts(recipe_ids, delta):
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        favorites_count=F('favorites_count') + delta,
+    )
+
+
+def change_recipes_count(user_id, delta):
+    User.objects.filter(pk=user_id).update(
+        recipes_count=F('recipes_count') + delta,
+    )
+
+
+def stale_favorites_counts():
+    return Recipe.objects.annotate(
+        actual=count_subquery(Favorite, 'recipe'),
+    ).exclude(favorites_count=F('actual'))
+
+
+def stale_recipes_counts():
+    return User.objects.annotate(
+        actual=count_subquery(Recipe, 'author'),
+    ).exclude(recipes_count=F('actual'))
+
+
+def reconcile_counters():
+    return (
+        Recipe.objects.update(
+            favorites_count=count_subquery(Favorite, 'recipe'),
+        ),
+        User.objects.update(recipes_count=count_subquery(Recipe, 'author')),
+    )
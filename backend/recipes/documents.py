@@ -0,0 +1,135 @@
+"""Pre-rendered recipe documents, the read model of the recipe API.
+
+A document holds the part of a recipe's representation that is the same
+for every reader: author, tags, ingredients, text and site-relative image
+URLs. Reader flags and ``favorites_count`` stay on the recipe rows and are
+merged in by ``api.compiled_serializers``.
+
+Writers refresh the documents they affect inside their own transaction:
+the recipe serializer and admin, the renditions worker, and the tag,
+ingredient and author signals.
+"""
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.dispatch import Signal
+
+from . import renditions
+from .constants import DOCUMENT_BATCH_SIZE
+from .models import (Ingredient, Recipe, RecipeDocument, RecipeIngredients,
+                     Tag)
+
+User = get_user_model()
+
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+# Sent with ``recipe_ids`` after documents were rewritten, i.e. whenever
+# what the recipe API shows for those recipes may have changed.
+documents_refreshed = Signal()
+
+
+def recipe_tags(recipe_ids):
+    tags = defaultdict(list)
+    rows = Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids,
+    ).order_by('tag__name').values_list(
+        'recipe_id', 'tag__id', 'tag__name', 'tag__color', 'tag__slug',
+    )
+    for recipe_id, pk, name, color, slug in rows:
+        tags[recipe_id].append(
+            {'id': pk, 'name': name, 'color': color, 'slug': slug}
+        )
+    return tags
+
+
+def recipe_ingredients(recipe_ids):
+    ingredients = defaultdict(list)
+    rows = RecipeIngredients.objects.filter(
+        recipe_id__in=recipe_ids,
+    ).order_by('-id').values_list(
+        'recipe_id', 'ingredient__id', 'ingredient__name',
+        'ingredient__measurement_unit', 'amount',
+    )
+    for recipe_id, pk, name, unit, amount in rows:
+        ingredients[recipe_id].append({
+            'id': pk, 'name': name, 'measurement_unit': unit,
+            'amount': amount,
+        })
+    return ingredients
+
+
+def build_documents(recipe_ids):
+    """Documents of the existing recipes among ``recipe_ids`` by id."""
+    if not recipe_ids:
+        return {}
+    rows = list(Recipe.objects.filter(pk__in=recipe_ids).values(
+        'id', 'name', 'image', 'renditions', 'text', 'cooking_time',
+        'author_id', *(f'author__{field}' for field in AUTHOR_FIELDS),
+    ))
+    if not rows:
+        return {}
+    recipe_ids = [row['id'] for row in rows]
+    tags = recipe_tags(recipe_ids)
+    ingredients = recipe_ingredients(recipe_ids)
+    storage = Recipe._meta.get_field('image').storage
+    return {
+        row['id']: {
+            'author': {
+                'id': row['author_id'],
+                **{
+                    field: row[f'author__{field}']
+                    for field in AUTHOR_FIELDS
+                },
+            },
+            'tags': tags.get(row['id'], []),
+            'ingredients': ingredients.get(row['id'], []),
+            'renditions': renditions.image_rendition_urls(
+                row['image'], row['renditions'], storage,
+            ),
+            'name': row['name'],
+            'image': storage.url(row['image']) if row['image'] else None,
+            'text': row['text'],
+            'cooking_time': row['cooking_time'],
+        }
+        for row in rows
+    }
+
+
+def refresh_documents(recipe_ids):
+    """Rewrite the documents of ``recipe_ids`` in the current transaction.
+
+    The recipe rows are locked first so that concurrent refreshes of the
+    same recipe do not race on the document's primary key.
+    """
+    recipe_ids = list(recipe_ids)
+    with transaction.atomic():
+        for start in range(0, len(recipe_ids), DOCUMENT_BATCH_SIZE):
+            batch = list(Recipe.objects.select_for_update().filter(
+                pk__in=recipe_ids[start:start + DOCUMENT_BATCH_SIZE],
+            ).values_list('pk', flat=True))
+            documents = build_documents(batch)
+            RecipeDocument.objects.filter(recipe_id__in=batch).delete()
+            RecipeDocument.objects.bulk_create(
+                RecipeDocument(recipe_id=pk, data=data)
+                for pk, data in documents.items()
+            )
+    if recipe_ids:
+        documents_refreshed.send(
+            sender=RecipeDocument, recipe_ids=recipe_ids,
+        )
+
+
+def affected_recipe_ids(instance):
+    """Ids of the recipes whose documents show ``instance``."""
+    if isinstance(instance, Tag):
+        recipes = Recipe.tags.through.objects.filter(tag=instance)
+    elif isinstance(instance, Ingredient):
+        recipes = RecipeIngredients.objects.filter(ingredient=instance)
+    elif isinstance(instance, User):
+        return list(Recipe.objects.filter(author=instance).values_list(
+            'pk', flat=True,
+        ))
+    else:
+        raise TypeError(f'Recipe documents do not show {instance!r}')
+    return list(recipes.values_list('recipe_id', flat=True))
@@ -0,0 +1,65 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left
+
+from django.db.models import Count
+
+from .constants import INGREDIENT_INDEX_TTL, INGREDIENT_SEARCH_LIMIT
+from .models import Ingredient
+
+
+class IngredientIndex:
+    """Process-local sorted index over ingredient names.
+
+    Built lazily on the first lookup and dropped by the ``Ingredient``
+    signals; the TTL lets other worker processes pick up changes and
+    refreshes usage counts used for ranking.
+    """
+
+    def __init__(self, ttl=INGREDIENT_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._keys = None
+        self._entries = None
+        self._built_at = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._keys = None
+            self._entries = None
+
+    def _build(self):
+        rows = Ingredient.objects.annotate(
+            usage=Count('recipeingredients'),
+        ).values_list('id', 'name', 'measurement_unit', 'usage')
+        entries = sorted(
+            (name.lower(), -usage, pk, Ingredient(
+                id=pk, name=name, measurement_unit=measurement_unit,
+            ))
+            for pk, name, measurement_unit, usage in rows
+        )
+        return [entry[0] for entry in entries], entries
+
+    def _get(self):
+        with self._lock:
+            expired = time.monotonic() - self._built_at > self.ttl
+            if self._entries is None or expired:
+                self._keys, self._entries = self._build()
+                self._built_at = time.monotonic()
+            return self._keys, self._entries
+
+    def search(self, prefix, limit=INGREDIENT_SEARCH_LIMIT):
+        keys, entries = self._get()
+        prefix = prefix.lower()
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + '\uffff', lo=start)
+        best = heapq.nsmallest(
+            limit,
+            entries[start:end],
+            key=lambda entry: (entry[0] != prefix, entry[1], entry[:3]),
+        )
+        return [entry[3] for entry in best]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,15 @@
+"""Helpers shared by the benchmark commands (not a command itself)."""
+from django.conf import settings
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def default_host():
+    """A host name the running settings accept in ``Host`` headers."""
+    return next(
+        (host for host in settings.ALLOWED_HOSTS if host != '*'),
+        'localhost',
+    ).lstrip('.')
@@ -0,0 +1,274 @@
+import json
+import random
+import time
+from collections import defaultdict
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import Resolver404, resolve
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+
+from recipes.models import Ingredient, Recipe, ShoppingCart, Tag
+from users.models import User
+from ._benchmark import default_host, percentile
+
+MIXES = ('browse', 'feed', 'autocomplete', 'cart', 'download')
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def endpoint_name(method, path):
+    try:
+        view_name = resolve(path.partition('?')[0]).view_name
+    except Resolver404:
+        view_name = path
+    return f'{method} {view_name}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Run scripted traffic mixes against the API and print per '
+        'endpoint throughput, latency percentiles and queries per request '
+        'as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mix',
+            action='append',
+            dest='mixes',
+            choices=MIXES,
+            help='Traffic mix to run; defaults to all of them.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Measured requests per mix.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=20,
+            help='Unmeasured requests per mix run first.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=50,
+            help='Number of users the authenticated mixes act as.',
+        )
+        parser.add_argument(
+            '--base-url',
+            help=(
+                'Send requests to a running server over HTTP instead of '
+                'the in-process test client; queries are not counted then.'
+            ),
+        )
+        parser.add_argument('--output', help='Write the JSON to this file.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.base_url = (options['base_url'] or '').rstrip('/')
+        self.client = Client(HTTP_HOST=default_host())
+        self.created_tokens = []
+        try:
+            report = self.benchmark(options)
+        finally:
+            # Tokens the run issued would stay valid logins otherwise.
+            Token.objects.filter(pk__in=self.created_tokens).delete()
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def benchmark(self, options):
+        self.load_fixtures(options['users'])
+        report = {
+            'config': {
+                key: options[key]
+                for key in ('requests', 'warmup', 'seed', 'users')
+            },
+            'mixes': {},
+        }
+        report['config']['target'] = self.base_url or 'in-process'
+        for mix in options['mixes'] or MIXES:
+            script = getattr(self, f'mix_{mix}')
+            self.run(script, options['warmup'])
+            report['mixes'][mix] = self.measure(script, options['requests'])
+        return report
+
+    def load_fixtures(self, user_count):
+        """Pick the recipes, users and search terms the mixes use."""
+        last = Recipe.objects.order_by('-pk').values_list('pk', flat=True)
+        last = last.first()
+        if last is None:
+            raise CommandError('No recipes; run generate_dataset first.')
+        self.recipes = sorted(Recipe.objects.filter(
+            pk__in=[self.rng.randint(1, last) for _ in range(2000)],
+        ).values_list('pk', flat=True))
+        self.pages = max(1, min(
+            50, Recipe.objects.count() // api_settings.PAGE_SIZE,
+        ))
+        self.tags = list(Tag.objects.values_list('slug', flat=True))
+        names = list(Ingredient.objects.order_by('pk').values_list(
+            'name', flat=True,
+        )[:5000])
+        self.ingredients = self.rng.sample(names, k=min(200, len(names)))
+        users = list(User.objects.filter(
+            shoppingcart__isnull=False,
+        ).order_by('pk').values_list('pk', flat=True).distinct()[:user_count])
+        if not users:
+            users = list(User.objects.order_by('pk').values_list(
+                'pk', flat=True,
+            )[:user_count])
+        if not users:
+            raise CommandError('No users; run generate_dataset first.')
+        self.tokens = {}
+        for pk in users:
+            token, created = Token.objects.get_or_create(user_id=pk)
+            if created:
+                self.created_tokens.append(token.pk)
+            self.tokens[token.key] = pk
+        self.token_keys = list(self.tokens)
+        self.authors = list(Recipe.objects.filter(
+            pk__in=self.recipes,
+        ).values_list('author_id', flat=True).distinct())
+
+    def page(self):
+        return min(self.pages, int(self.rng.paretovariate(1.2)))
+
+    def mix_browse(self):
+        roll = self.rng.random()
+        if roll < 0.5:
+            yield None, 'GET', f'/api/recipes/?page={self.page()}'
+        elif roll < 0.9:
+            yield None, 'GET', f'/api/recipes/{self.rng.choice(self.recipes)}/'
+        else:
+            yield None, 'GET', '/api/tags/'
+
+    def mix_feed(self):
+        token = self.rng.choice(self.token_keys)
+        roll = self.rng.random()
+        if roll < 0.4:
+            tags = self.rng.sample(self.tags, min(2, len(self.tags)))
+            query = '&'.join(f'tags={slug}' for slug in tags)
+            yield token, 'GET', f'/api/recipes/?{query}&page={self.page()}'
+        elif roll < 0.6:
+            yield token, 'GET', '/api/recipes/?is_favorited=1'
+        elif roll < 0.8:
+            author = self.rng.choice(self.authors)
+            yield token, 'GET', f'/api/recipes/?author={author}'
+        else:
+            yield token, 'GET', '/api/users/subscriptions/?recipes_limit=3'
+
+    def mix_autocomplete(self):
+        """A user typing the first letters of an ingredient name."""
+        name = self.rng.choice(self.ingredients)
+        for length in range(1, min(len(name), 5) + 1):
+            yield None, 'GET', f'/api/ingredients/?name={quote(name[:length])}'
+
+    def mix_cart(self):
+        """Add a recipe to a cart and remove it again."""
+        token = self.rng.choice(self.token_keys)
+        recipe = self.rng.choice(self.recipes)
+        in_cart = ShoppingCart.objects.filter(
+            user_id=self.tokens[token], recipe_id=recipe,
+        ).exists()
+        methods = ('DELETE', 'POST') if in_cart else ('POST', 'DELETE')
+        for method in methods:
+            yield token, method, f'/api/recipes/{recipe}/shopping_cart/'
+
+    def mix_download(self):
+        token = self.rng.choice(self.token_keys)
+        fmt = self.rng.choice(('txt', 'txt', 'csv', 'json'))
+        yield token, 'GET', (
+            f'/api/recipes/download_shopping_cart/?format={fmt}'
+        )
+
+    def run(self, script, count):
+        results = []
+        while len(results) < count:
+            for token, method, path in script():
+                results.append((method, path, *self.request(
+                    token, method, path,
+                )))
+        return results
+
+    def measure(self, script, count):
+        started = time.perf_counter()
+        results = self.run(script, count)
+        elapsed = time.perf_counter() - started
+        endpoints = defaultdict(list)
+        for method, path, status, latency, queries in results:
+            endpoints[endpoint_name(method, path)].append(
+                (status, latency, queries)
+            )
+        return {
+            'requests': len(results),
+            'seconds': round(elapsed, 3),
+            'throughput': round(len(results) / elapsed, 1),
+            'endpoints': {
+                name: self.summary(rows) for name, rows in endpoints.items()
+            },
+        }
+
+    def summary(self, rows):
+        latencies = [latency * 1000 for status, latency, queries in rows]
+        queries = [queries for status, latency, queries in rows]
+        return {
+            'requests': len(rows),
+            'errors': sum(1 for status, *_ in rows if status >= 500),
+            'statuses': sorted({status for status, *_ in rows}),
+            'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'queries_per_request': (
+                None if None in queries
+                else round(sum(queries) / len(queries), 2)
+            ),
+        }
+
+    def request(self, token, method, path):
+        """Return (status, seconds, queries) of one request."""
+        if self.base_url:
+            return self.request_http(token, method, path)
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.client.generic(method, path, **headers)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return (
+            response.status_code, time.perf_counter() - started,
+            counter.count,
+        )
+
+    def request_http(self, token, method, path):
+        headers = {'Authorization': f'Token {token}'} if token else {}
+        request = Request(self.base_url + path, method=method, headers=headers)
+        started = time.perf_counter()
+        try:
+            with urlopen(request) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            error.read()
+            status = error.code
+        return status, time.perf_counter() - started, None
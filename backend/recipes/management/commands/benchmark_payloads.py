@@ -0,0 +1,127 @@
+import json
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.compiled_serializers import recipe_rows, serialize_recipes
+from api.compression import COMPRESSORS, compress
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, fast_json
+from api.serializers import IngredientSerializer
+from recipes.models import Ingredient, Recipe
+from ._benchmark import default_host
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare JSON rendering and parsing of the recipe list and '
+        'ingredient list payloads with the standard library and the fast '
+        'backend, and their compressed sizes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[6, 50, 500],
+            help='Recipe list page sizes to measure.',
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the results as JSON.',
+        )
+
+    def handle(self, *args, **options):
+        if not Recipe.objects.exists():
+            raise CommandError('No recipes; run generate_dataset first.')
+        if fast_json is None:
+            self.stderr.write(
+                'orjson is not in use; both columns use the standard library.'
+            )
+        request = Request(APIRequestFactory().get(
+            '/api/recipes/', HTTP_HOST=default_host(),
+        ))
+        payloads = {
+            f'recipes[{size}]': serialize_recipes(recipe_rows(
+                Recipe.objects.with_related().with_user_flags(
+                    request.user,
+                )[:size],
+            ), request)
+            for size in options['sizes']
+        }
+        payloads['ingredients'] = IngredientSerializer(
+            Ingredient.objects.all(), many=True,
+        ).data
+        results = {
+            name: self.measure(data, options['repeat'])
+            for name, data in payloads.items()
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+            return
+        encodings = list(COMPRESSORS)
+        self.stdout.write(
+            f'{"payload":<14} {"bytes":>9} {"render ms":>17} '
+            f'{"parse ms":>17} '
+            + ' '.join(f'{name + " bytes/ms":>17}' for name in encodings)
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<14} {result["bytes"]:>9} '
+                f'{result["render_json_ms"]:>8.2f}/'
+                f'{result["render_fast_ms"]:<8.2f} '
+                f'{result["parse_json_ms"]:>8.2f}/'
+                f'{result["parse_fast_ms"]:<8.2f} '
+                + ' '.join(
+                    f'{result[encoding + "_bytes"]:>9}/'
+                    f'{result[encoding + "_ms"]:<7.2f}'
+                    for encoding in encodings
+                )
+            )
+
+    def timed(self, function, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, round(best * 1000, 3)
+
+    def measure(self, data, repeat):
+        body, render_json = self.timed(
+            lambda: JSONRenderer().render(data), repeat,
+        )
+        fast_body, render_fast = self.timed(
+            lambda: FastJSONRenderer().render(data), repeat,
+        )
+        if json.loads(fast_body) != json.loads(body):
+            raise CommandError('The renderers produce different documents.')
+        _, parse_json = self.timed(
+            lambda: JSONParser().parse(BytesIO(body)), repeat,
+        )
+        _, parse_fast = self.timed(
+            lambda: FastJSONParser().parse(BytesIO(body)), repeat,
+        )
+        result = {
+            'bytes': len(body),
+            'render_json_ms': render_json,
+            'render_fast_ms': render_fast,
+            'parse_json_ms': parse_json,
+            'parse_fast_ms': parse_fast,
+        }
+        for encoding in COMPRESSORS:
+            compressed, elapsed = self.timed(
+                lambda: compress(body, encoding), repeat,
+            )
+            result[f'{encoding}_bytes'] = len(compressed)
+            result[f'{encoding}_ms'] = elapsed
+        return result
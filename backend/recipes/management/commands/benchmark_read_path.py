@@ -0,0 +1,189 @@
+import asyncio
+import sys
+import time
+from io import BytesIO
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from foodgram.asgi import ReadPathASGIHandler
+from recipes.models import Recipe
+from ._benchmark import default_host, percentile
+
+MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+
+
+class DatabaseDelay:
+    """Execute wrapper that makes every query ``delay`` seconds slower."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.delay)
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare how many concurrent reads one worker serves under WSGI '
+        'and under ASGI with the async read path.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Requests in flight for the ASGI modes.',
+        )
+        parser.add_argument(
+            '--db-delay',
+            type=float,
+            default=20,
+            help='Milliseconds added to every query to model a slow DB.',
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help='Path to request; repeat to cycle over several.',
+        )
+        parser.add_argument(
+            '--mode',
+            action='append',
+            dest='modes',
+            choices=MODES,
+            help='Deployment to measure; defaults to all of them.',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be >= 1.')
+        self.host = default_host()
+        self.paths = options['paths'] or self.default_paths()
+        delay = DatabaseDelay(options['db_delay'] / 1000)
+        if delay.delay:
+            connection_created.connect(delay.install)
+            for connection in connections.all():
+                delay.install(connection)
+        self.stdout.write(
+            f'{options["requests"]} requests over {", ".join(self.paths)}, '
+            f'{options["db_delay"]:g}ms per query'
+        )
+        self.stdout.write(
+            f'{"mode":<11} {"in flight":>9} {"req/s":>8} '
+            f'{"p50 ms":>8} {"p95 ms":>8} {"errors":>6}'
+        )
+        try:
+            for mode in options['modes'] or MODES:
+                self.report(mode, options['requests'], options['concurrency'])
+        finally:
+            connection_created.disconnect(delay.install)
+            for connection in connections.all():
+                if delay in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(delay)
+
+    def default_paths(self):
+        paths = ['/api/recipes/', '/api/ingredients/', '/api/tags/']
+        recipe = Recipe.objects.only('pk').first()
+        if recipe is not None:
+            paths.insert(1, f'/api/recipes/{recipe.pk}/')
+        return paths
+
+    def report(self, mode, requests, concurrency):
+        paths = [self.paths[i % len(self.paths)] for i in range(requests)]
+        started = time.perf_counter()
+        if mode == 'wsgi':
+            concurrency = 1
+            results = self.run_wsgi(paths)
+        else:
+            handler = ASGIHandler if mode == 'asgi-sync' else (
+                ReadPathASGIHandler
+            )
+            results = asyncio.run(self.run_asgi(handler(), paths, concurrency))
+        elapsed = time.perf_counter() - started
+        latencies = [latency * 1000 for status, latency in results]
+        errors = sum(1 for status, latency in results if status >= 400)
+        self.stdout.write(
+            f'{mode:<11} {concurrency:>9} {requests / elapsed:>8.1f} '
+            f'{percentile(latencies, 0.5):>8.1f} '
+            f'{percentile(latencies, 0.95):>8.1f} {errors:>6}'
+        )
+
+    def run_wsgi(self, paths):
+        """Serve requests one at a time, like a sync gunicorn worker."""
+        handler = WSGIHandler()
+        results = []
+        for path in paths:
+            status = []
+            path_info, _, query = path.partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'SCRIPT_NAME': '',
+                'PATH_INFO': path_info,
+                'QUERY_STRING': query,
+                'SERVER_NAME': self.host,
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': self.host,
+                'wsgi.version': (1, 0),
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': BytesIO(),
+                'wsgi.errors': sys.stderr,
+                'wsgi.multithread': False,
+                'wsgi.multiprocess': True,
+                'wsgi.run_once': False,
+            }
+            started = time.perf_counter()
+            response = handler(
+                environ, lambda code, headers: status.append(int(code[:3])),
+            )
+            b''.join(response)
+            response.close()
+            results.append((status[0], time.perf_counter() - started))
+        return results
+
+    async def run_asgi(self, handler, paths, concurrency):
+        """Keep ``concurrency`` requests in flight on one event loop."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request(path):
+            path_info, _, query = path.partition('?')
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path_info,
+                'raw_path': path_info.encode(),
+                'query_string': query.encode(),
+                'root_path': '',
+                'headers': [(b'host', self.host.encode())],
+                'client': ('127.0.0.1', 0),
+                'server': (self.host, 80),
+            }
+            status = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            async with semaphore:
+                started = time.perf_counter()
+                await handler(scope, receive, send)
+                return status[0], time.perf_counter() - started
+
+        return await asyncio.gather(*(request(path) for path in paths))
@@ -0,0 +1,119 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.compiled_serializers import recipe_rows, serialize_recipes
+from api.serializers import RecipeReadSerializer
+from recipes.models import Favorite, Recipe
+from ._benchmark import default_host
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that the compiled recipe serializer renders the same bytes '
+        'as RecipeReadSerializer and compare their speed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[6, 50, 500],
+            help='Page sizes to measure.',
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only check that both serializers render the same JSON.',
+        )
+
+    def handle(self, *args, **options):
+        if not Recipe.objects.exists():
+            raise CommandError('No recipes; run generate_dataset first.')
+        favorite = Favorite.objects.select_related('user').first()
+        users = [AnonymousUser()]
+        if favorite is not None:
+            users.append(favorite.user)
+        sizes = options['sizes']
+        for user in users:
+            for size in sizes:
+                self.verify(user, size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Output is identical for {len(users)} users at page sizes '
+            f'{", ".join(map(str, sizes))}.'
+        ))
+        if options['verify']:
+            return
+        self.stdout.write(
+            f'{"size":>5} {"drf ms":>9} {"compiled ms":>12} {"speedup":>8} '
+            f'{"queries":>8}'
+        )
+        for size in sizes:
+            self.benchmark(users[-1], size, options['repeat'])
+
+    def make_request(self, user):
+        request = Request(APIRequestFactory().get(
+            '/api/recipes/', HTTP_HOST=default_host(),
+        ))
+        request.user = user
+        return request
+
+    def queryset(self, user, size):
+        return Recipe.objects.with_related().with_user_flags(user)[:size]
+
+    def render_drf(self, request, size):
+        return JSONRenderer().render(RecipeReadSerializer(
+            self.queryset(request.user, size),
+            many=True,
+            context={'request': request},
+        ).data)
+
+    def render_compiled(self, request, size):
+        return JSONRenderer().render(serialize_recipes(
+            recipe_rows(self.queryset(request.user, size)), request,
+        ))
+
+    def verify(self, user, size):
+        request = self.make_request(user)
+        expected = self.render_drf(request, size)
+        actual = self.render_compiled(request, size)
+        if expected != actual:
+            position = next(
+                (i for i, pair in enumerate(zip(expected, actual))
+                 if pair[0] != pair[1]),
+                min(len(expected), len(actual)),
+            )
+            raise CommandError(
+                f'Outputs differ for {user} at page size {size} near '
+                f'{expected[position - 40:position + 40]!r} != '
+                f'{actual[position - 40:position + 40]!r}'
+            )
+
+    def timed(self, render, request, size, repeat):
+        best = None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                render(request, size)
+                elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000, len(queries)
+
+    def benchmark(self, user, size, repeat):
+        request = self.make_request(user)
+        drf, drf_queries = self.timed(self.render_drf, request, size, repeat)
+        compiled, queries = self.timed(
+            self.render_compiled, request, size, repeat,
+        )
+        self.stdout.write(
+            f'{size:>5} {drf:>9.2f} {compiled:>12.2f} '
+            f'{drf / compiled:>7.1f}x {drf_queries:>3}/{queries:<4}'
+        )
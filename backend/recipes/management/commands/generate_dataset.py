@@ -0,0 +1,288 @@
+import random
+from io import BytesIO
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from PIL import Image
+
+from recipes.counters import reconcile_counters
+from recipes.documents import refresh_documents
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredients,
+                            ShoppingCart, ShoppingCartIngredient, Tag)
+from recipes.search import recipe_search_vector, uses_postgres_search
+from recipes.shopping_list import expected_totals
+from users.models import Follow
+
+User = get_user_model()
+
+IMAGE_NAME = 'synthetic/recipe.png'
+DISHES = (
+    'Суп', 'Салат', 'Пирог', 'Рагу', 'Запеканка', 'Омлет', 'Паста',
+    'Плов', 'Каша', 'Соус', 'Котлеты', 'Блины', 'Жаркое', 'Смузи',
+)
+STEPS = (
+    'Нарезать', 'Обжарить', 'Потушить', 'Смешать', 'Запечь', 'Отварить',
+    'Взбить', 'Посолить', 'Остудить', 'Подать',
+)
+AMOUNTS = (1, 2, 3, 5, 10, 20, 50, 100, 150, 200, 250, 300, 500)
+
+
+def zipf_cum_weights(count, exponent):
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def heavy_tailed(rng, mean, cap, shape=2.0):
+    """Draw a Pareto distributed count with the given mean, capped."""
+    if mean <= 0 or cap <= 0:
+        return 0
+    scale = mean * (shape - 1) / shape
+    return min(cap, int(scale * rng.paretovariate(shape)))
+
+
+def sample_distinct(rng, population, cum_weights, count, exclude=None):
+    if count <= 0:
+        return []
+    chosen = dict.fromkeys(
+        item for item in rng.choices(
+            population, cum_weights=cum_weights, k=count * 2,
+        )
+        if item != exclude
+    )
+    return list(chosen)[:count]
+
+
+def shared_image():
+    if not default_storage.exists(IMAGE_NAME):
+        buffer = BytesIO()
+        Image.new('RGB', (480, 480), (230, 180, 120)).save(buffer, 'PNG')
+        default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+    return IMAGE_NAME
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a reproducible synthetic dataset of users, recipes, '
+        'favorites, shopping carts and subscriptions for load testing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument(
+            '--favorites',
+            type=float,
+            default=10,
+            help='Mean favorites per user.',
+        )
+        parser.add_argument(
+            '--cart',
+            type=float,
+            default=2,
+            help='Mean shopping cart recipes per user.',
+        )
+        parser.add_argument(
+            '--follows',
+            type=float,
+            default=5,
+            help='Mean subscriptions per user.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--prefix',
+            default='load',
+            help='Username prefix; change it to generate another set.',
+        )
+        parser.add_argument(
+            '--password',
+            help='Password of every generated user; unusable by default.',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.ingredient_names = dict(
+            Ingredient.objects.order_by('pk').values_list('pk', 'name')
+        )
+        ingredient_ids = list(self.ingredient_names)
+        tag_ids = list(Tag.objects.order_by('pk').values_list('pk', flat=True))
+        if not ingredient_ids or not tag_ids:
+            raise CommandError(
+                'Load the ingredient catalogue and create tags first.'
+            )
+        if options['users'] < 1:
+            raise CommandError('--users must be at least 1.')
+        prefix = f'{options["prefix"]}{options["seed"]}-'
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Users starting with {prefix!r} already exist; '
+                'pass another --prefix or --seed.'
+            )
+        # Popularity follows a power law over a seeded random ranking.
+        self.rng.shuffle(ingredient_ids)
+        self.rng.shuffle(tag_ids)
+        self.ingredients = ingredient_ids
+        self.ingredient_weights = zipf_cum_weights(len(ingredient_ids), 1.0)
+        self.tags = tag_ids
+        self.tag_weights = zipf_cum_weights(len(tag_ids), 1.2)
+
+        users = self.create_users(
+            prefix, options['users'], options['password'],
+        )
+        self.rng.shuffle(users)
+        user_weights = zipf_cum_weights(len(users), 0.9)
+        recipes = self.create_recipes(
+            users, user_weights, options['recipes'],
+        )
+        self.reset_sequences()
+        self.rng.shuffle(recipes)
+        recipe_weights = zipf_cum_weights(len(recipes), 1.0)
+        counts = {'users': len(users), 'recipes': len(recipes)}
+        for model, mean in (
+            (Favorite, options['favorites']),
+            (ShoppingCart, options['cart']),
+        ):
+            counts[model._meta.model_name] = self.insert(model, (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in users
+                for recipe_id in sample_distinct(
+                    self.rng, recipes, recipe_weights,
+                    heavy_tailed(self.rng, mean, len(recipes)),
+                )
+            ))
+        # Prolific authors are also the most followed ones.
+        counts['follow'] = self.insert(Follow, (
+            Follow(follower_id=user_id, following_id=following_id)
+            for user_id in users
+            for following_id in sample_distinct(
+                self.rng, users, user_weights,
+                heavy_tailed(self.rng, options['follows'], len(users) - 1),
+                exclude=user_id,
+            )
+        ))
+        self.update_derived(users, recipes)
+        self.stdout.write(self.style.SUCCESS(
+            'Generated {users} users, {recipes} recipes, {favorite} '
+            'favorites, {shoppingcart} cart entries and {follow} '
+            'subscriptions.'.format(**counts)
+        ))
+
+    def insert(self, model, objects):
+        total = 0
+        objects = iter(objects)
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                return total
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            total += len(batch)
+
+    def first_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def create_users(self, prefix, count, password):
+        first = self.first_id(User)
+        password = make_password(password)
+        ids = list(range(first, first + count))
+        self.insert(User, (
+            User(
+                pk=pk,
+                username=f'{prefix}{number}',
+                email=f'{prefix}{number}@example.com',
+                first_name='Load',
+                last_name=f'User {number}',
+                password=password,
+            )
+            for number, pk in enumerate(ids)
+        ))
+        return ids
+
+    def create_recipes(self, users, user_weights, count):
+        first = self.first_id(Recipe)
+        ids = list(range(first, first + count))
+        image = shared_image()
+        for start in range(0, count, self.batch_size):
+            batch_ids = ids[start:start + self.batch_size]
+            authors = self.rng.choices(
+                users, cum_weights=user_weights, k=len(batch_ids),
+            )
+            recipes, tags, ingredients = [], [], []
+            for pk, author_id in zip(batch_ids, authors):
+                ingredient_ids = sample_distinct(
+                    self.rng, self.ingredients, self.ingredient_weights,
+                    self.rng.randint(3, 12),
+                )
+                recipes.append(self.make_recipe(
+                    pk, author_id, image, ingredient_ids,
+                ))
+                tags.extend(
+                    Recipe.tags.through(recipe_id=pk, tag_id=tag_id)
+                    for tag_id in sample_distinct(
+                        self.rng, self.tags, self.tag_weights,
+                        self.rng.randint(1, min(3, len(self.tags))),
+                    )
+                )
+                ingredients.extend(
+                    RecipeIngredients(
+                        recipe_id=pk,
+                        ingredient_id=ingredient_id,
+                        amount=self.rng.choice(AMOUNTS),
+                    )
+                    for ingredient_id in ingredient_ids
+                )
+            with transaction.atomic():
+                Recipe.objects.bulk_create(recipes)
+                Recipe.tags.through.objects.bulk_create(tags)
+                RecipeIngredients.objects.bulk_create(ingredients)
+        return ids
+
+    def make_recipe(self, pk, author_id, image, ingredient_ids):
+        names = [self.ingredient_names[pk] for pk in ingredient_ids]
+        steps = [
+            f'{step} {name}' for step, name in zip(
+                self.rng.sample(STEPS, min(len(STEPS), len(names))), names,
+            )
+        ]
+        return Recipe(
+            pk=pk,
+            author_id=author_id,
+            name=f'{self.rng.choice(DISHES)}: {", ".join(names[:2])}'[:200],
+            image=image,
+            text='. '.join(steps) + '.',
+            cooking_time=self.rng.randint(5, 180),
+        )
+
+    def reset_sequences(self):
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [User, Recipe],
+            ):
+                cursor.execute(sql)
+
+    def update_derived(self, users, recipes):
+        """Fill what the bypassed signals would have maintained."""
+        reconcile_counters()
+        self.insert(ShoppingCartIngredient, (
+            ShoppingCartIngredient(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount,
+            )
+            for (user_id, ingredient_id), amount in expected_totals(
+                User.objects.filter(pk__range=(min(users), max(users))),
+            ).items()
+        ))
+        if uses_postgres_search() and recipes:
+            Recipe.objects.filter(
+                pk__range=(min(recipes), max(recipes)),
+            ).update(search_vector=recipe_search_vector())
+        for start in range(0, len(recipes), self.batch_size):
+            refresh_documents(recipes[start:start + self.batch_size])
@@ -0,0 +1,131 @@
+import json
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from api.cache import bump_data_version
+from recipes.documents import refresh_documents
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient, RecipeIngredients
+
+READ_SIZE = 64 * 1024
+
+
+def iter_json_array(file, read_size=READ_SIZE):
+    """Yield the items of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(read_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Expected a JSON array')
+    position = 1
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = file.read(read_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+
+
+def parse_ingredient(item):
+    fields = item.get('fields', item)
+    return (
+        item.get('pk'),
+        fields['name'].strip(),
+        fields['measurement_unit'].strip(),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Upsert the ingredient catalogue from a JSON array of fixture '
+        'objects or {"name", "measurement_unit"} objects.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        try:
+            with open(options['path'], encoding='utf-8') as file:
+                items = map(parse_ingredient, iter_json_array(file))
+                while True:
+                    batch = list(islice(items, options['batch_size']))
+                    if not batch:
+                        break
+                    with transaction.atomic():
+                        self.load_batch(batch)
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Cannot load ingredients: {exc!r}')
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [Ingredient],
+            ):
+                cursor.execute(sql)
+        # Rows were written in bulk, without the Ingredient signals. Server
+        # processes rebuild their index when its TTL runs out.
+        ingredient_index.invalidate()
+        bump_data_version('ingredients')
+        self.stdout.write(self.style.SUCCESS(
+            'Inserted {inserted}, updated {updated}, '
+            'skipped {skipped}.'.format(**self.counts)
+        ))
+
+    def existing_pairs(self, pairs):
+        if not pairs:
+            return set()
+        return pairs & set(Ingredient.objects.filter(
+            name__in={name for name, unit in pairs},
+        ).values_list('name', 'measurement_unit'))
+
+    def load_batch(self, batch):
+        by_pk = Ingredient.objects.in_bulk(
+            [pk for pk, name, unit in batch if pk is not None]
+        )
+        known = set(Ingredient.objects.filter(
+            name__in={name for pk, name, unit in batch},
+        ).values_list('name', 'measurement_unit'))
+        created = []
+        changed = []
+        for pk, name, unit in batch:
+            if (name, unit) in known:
+                self.counts['skipped'] += 1
+                continue
+            known.add((name, unit))
+            if pk in by_pk:
+                ingredient = by_pk[pk]
+                ingredient.name = name
+                ingredient.measurement_unit = unit
+                changed.append(ingredient)
+            else:
+                created.append(
+                    Ingredient(pk=pk, name=name, measurement_unit=unit)
+                )
+        Ingredient.objects.bulk_update(changed, ('name', 'measurement_unit'))
+        # Renamed ingredients show up in recipe documents.
+        refresh_documents(set(RecipeIngredients.objects.filter(
+            ingredient__in=changed,
+        ).values_list('recipe_id', flat=True)))
+        # ignore_conflicts drops rows taken meanwhile without saying which,
+        # so count the new rows that are actually there.
+        pairs = {(item.name, item.measurement_unit) for item in created}
+        before = self.existing_pairs(pairs)
+        Ingredient.objects.bulk_create(created, ignore_conflicts=True)
+        inserted = len(self.existing_pairs(pairs) - before)
+        self.counts['updated'] += len(changed)
+        self.counts['inserted'] += inserted
+        self.counts['skipped'] += len(created) - inserted
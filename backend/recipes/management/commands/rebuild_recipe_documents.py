@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.constants import DOCUMENT_BATCH_SIZE
+from recipes.documents import build_documents, refresh_documents
+from recipes.models import Recipe, RecipeDocument
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the pre-rendered recipe documents.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare stored documents with the recipes.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DOCUMENT_BATCH_SIZE,
+            help='Recipes rebuilt per transaction.',
+        )
+
+    def recipe_batches(self, batch_size):
+        last = 0
+        while True:
+            batch = list(Recipe.objects.filter(pk__gt=last).order_by(
+                'pk',
+            ).values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                return
+            yield batch
+            last = batch[-1]
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            return self.verify(options['batch_size'])
+        total = 0
+        for batch in self.recipe_batches(options['batch_size']):
+            refresh_documents(batch)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt documents of {total} recipes.'
+        ))
+
+    def verify(self, batch_size):
+        stale = []
+        total = 0
+        for batch in self.recipe_batches(batch_size):
+            stored = dict(RecipeDocument.objects.filter(
+                recipe_id__in=batch,
+            ).values_list('recipe_id', 'data'))
+            for pk, document in build_documents(batch).items():
+                if stored.get(pk) != document:
+                    stale.append(pk)
+            total += len(batch)
+        for pk in stale:
+            self.stdout.write(f'recipe {pk}: document is missing or stale')
+        if stale:
+            raise CommandError(f'{len(stale)} documents are out of sync.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} documents are in sync.'
+        ))
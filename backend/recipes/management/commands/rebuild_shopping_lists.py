@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import ShoppingCartIngredient
+from recipes.shopping_list import expected_totals, stored_totals
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify per-user shopping cart ingredient totals.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare stored totals with the shopping carts.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            return self.verify()
+        with transaction.atomic():
+            ShoppingCartIngredient.objects.all().delete()
+            ShoppingCartIngredient.objects.bulk_create(
+                (
+                    ShoppingCartIngredient(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        amount=amount,
+                    )
+                    for (user_id, ingredient_id), amount
+                    in expected_totals().items()
+                ),
+                batch_size=options['batch_size'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {ShoppingCartIngredient.objects.count()} totals.'
+        ))
+
+    def verify(self):
+        expected = expected_totals()
+        stored = stored_totals()
+        mismatches = [
+            (key, expected.get(key), stored.get(key))
+            for key in expected.keys() | stored.keys()
+            if expected.get(key) != stored.get(key)
+        ]
+        for (user_id, ingredient_id), want, have in sorted(mismatches):
+            self.stdout.write(
+                f'user {user_id} ingredient {ingredient_id}: '
+                f'expected {want}, stored {have}'
+            )
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} totals are out of sync.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(stored)} totals are in sync.'
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.counters import (reconcile_counters, stale_favorites_counts,
+                              stale_recipes_counts)
+
+
+class Command(BaseCommand):
+    help = 'Recount recipe favorites and user recipes counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report counters that are out of sync.',
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            return self.verify()
+        recipes, users = reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted {recipes} recipes and {users} users.'
+        ))
+
+    def verify(self):
+        stale = 0
+        for recipe in stale_favorites_counts():
+            stale += 1
+            self.stdout.write(
+                f'recipe {recipe.pk}: stored {recipe.favorites_count}, '
+                f'actual {recipe.actual}'
+            )
+        for user in stale_recipes_counts():
+            stale += 1
+            self.stdout.write(
+                f'user {user.pk}: stored {user.recipes_count}, '
+                f'actual {user.actual}'
+            )
+        if stale:
+            raise CommandError(f'{stale} counters are out of sync.')
+        self.stdout.write(self.style.SUCCESS('All counters are in sync.'))
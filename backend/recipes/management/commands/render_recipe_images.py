@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.renditions import needs_renditions, render_recipe_image
+
+
+class Command(BaseCommand):
+    help = 'Render missing resized variants of recipe images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-render variants that already exist.',
+        )
+
+    def handle(self, *args, **options):
+        rendered = 0
+        recipes = Recipe.objects.only('image', 'renditions').order_by('pk')
+        for recipe in recipes.iterator():
+            if options['all']:
+                Recipe.objects.filter(pk=recipe.pk).update(renditions={})
+            elif not needs_renditions(recipe):
+                continue
+            render_recipe_image(recipe.pk)
+            rendered += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered images of {rendered} recipes.'
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.14 on 2026-10-18 19:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeDocument',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='recipes.recipe', verbose_name='recipe')),
+                ('data', models.JSONField(verbose_name='rendered recipe')),
+            ],
+            options={
+                'verbose_name': 'recipe document',
+                'verbose_name_plural': 'recipe documents',
+            },
+        ),
+    ]
@@ -1,10 +1,13 @@
 from autoslug import AutoSlugField
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch, Value
 from django.utils.translation import gettext_lazy as _
 
+from users.models import Follow
 from .constants import (
     COLOR_PALETTE, COOKING_TIME_MIN_VALUE, INGREDIENT_MIN_AMOUNT,
 )
@@ -72,6 +75,40 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self):
+        return self.defer('search_vector').select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipeingredients_set',
+                queryset=RecipeIngredients.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                is_subscribed=Value(False),
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'),
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'),
+            )),
+            is_subscribed=Exists(Follow.objects.filter(
+                follower=user, following=OuterRef('author'),
+            )),
+        )
+
+
 class Recipe(models.Model):
     name = models.CharField(
         verbose_name=_('recipe name'),
@@ -96,6 +133,11 @@ class Recipe(models.Model):
     image = models.ImageField(
         verbose_name=_('recipe image'),
     )
+    renditions = models.JSONField(
+        verbose_name=_('image renditions'),
+        default=dict,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name=_('recipe text'),
     )
@@ -108,9 +150,28 @@ class Recipe(models.Model):
             )
         ]
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name=_('favorites count'),
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        verbose_name=_('search vector'),
+        null=True,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ['-id']
+        indexes = [
+            # ordering=popular
+            models.Index(
+                fields=['-favorites_count', '-id'],
+                name='recipe_popular_idx',
+            ),
+        ]
         verbose_name = _('recipe')
         verbose_name_plural = _('recipes')
 
@@ -197,3 +258,51 @@ class ShoppingCart(models.Model):
         ]
         verbose_name = _('shopping cart')
         verbose_name_plural = _('shopping carts')
+
+
+class ShoppingCartIngredient(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name=_('user'),
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name=_('ingredient'),
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name=_('total amount'),
+    )
+
+    class Meta:
+        ordering = ['ingredient__name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='%(app_label)s_%(class)s_unique',
+            )
+        ]
+        verbose_name = _('shopping cart ingredient')
+        verbose_name_plural = _('shopping cart ingredients')
+
+
+class RecipeDocument(models.Model):
+    """Reader-independent part of a recipe's API representation.
+
+    Maintained by ``recipes.documents``; see there for what it holds.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='document',
+        verbose_name=_('recipe'),
+    )
+    data = models.JSONField(
+        verbose_name=_('rendered recipe'),
+    )
+
+    class Meta:
+        verbose_name = _('recipe document')
+        verbose_name_plural = _('recipe documents')
@@ -0,0 +1,133 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+from . import documents
+from .constants import (RENDITION_FORMATS, RENDITION_QUALITY,
+                        RENDITION_SIZES, RENDITION_WORKERS)
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=RENDITION_WORKERS,
+                thread_name_prefix='renditions',
+            )
+        return _executor
+
+
+def needs_renditions(recipe):
+    return bool(recipe.image) and (
+        recipe.renditions.get('source') != recipe.image.name
+    )
+
+
+def schedule_renditions(recipe_id):
+    get_executor().submit(render_in_worker, recipe_id)
+
+
+def render_in_worker(recipe_id):
+    try:
+        render_recipe_image(recipe_id)
+    finally:
+        connection.close()
+
+
+def render_variants(image, storage, stem):
+    renditions = {}
+    for size_name, size in RENDITION_SIZES.items():
+        variant = image.copy()
+        variant.thumbnail(size, Image.Resampling.LANCZOS)
+        renditions[size_name] = {}
+        for image_format, extension in RENDITION_FORMATS:
+            buffer = BytesIO()
+            variant.save(
+                buffer, image_format, quality=RENDITION_QUALITY, optimize=True,
+            )
+            renditions[size_name][extension] = storage.save(
+                f'renditions/{stem}_{size_name}.{extension}',
+                ContentFile(buffer.getvalue()),
+            )
+    return renditions
+
+
+def rendition_paths(renditions):
+    return [
+        path
+        for key, variants in renditions.items() if key != 'source'
+        for path in variants.values()
+    ]
+
+
+def render_recipe_image(recipe_id):
+    """Store resized JPEG/WebP variants of the recipe image.
+
+    Runs on the worker pool; a recipe whose image was replaced meanwhile
+    keeps the renditions of the newer image.
+    """
+    try:
+        recipe = Recipe.objects.filter(pk=recipe_id).only(
+            'image', 'renditions',
+        ).first()
+        if recipe is None or not needs_renditions(recipe):
+            return
+        source = recipe.image.name
+        storage = recipe.image.storage
+        with recipe.image.open('rb') as image_file:
+            image = Image.open(image_file)
+            image = ImageOps.exif_transpose(image).convert('RGB')
+        renditions = render_variants(
+            image, storage, os.path.splitext(os.path.basename(source))[0],
+        )
+        renditions['source'] = source
+        with transaction.atomic():
+            updated = Recipe.objects.filter(
+                pk=recipe_id, image=source,
+            ).update(renditions=renditions)
+            if updated:
+                documents.refresh_documents([recipe_id])
+        stale = recipe.renditions if updated else renditions
+        for path in rendition_paths(stale):
+            storage.delete(path)
+    except Exception:
+        logger.exception('Failed to render images of recipe %s', recipe_id)
+
+
+def rendition_urls(recipe, request=None):
+    return image_rendition_urls(
+        recipe.image.name,
+        recipe.renditions,
+        recipe.image.storage,
+        request.build_absolute_uri if request is not None else None,
+    )
+
+
+def image_rendition_urls(image_name, renditions, storage, build_url=None):
+    """Rendition URLs from raw field values; empty while they are stale."""
+    if not image_name or renditions.get('source') != image_name:
+        return {}
+    urls = {}
+    for key, variants in renditions.items():
+        if key == 'source':
+            continue
+        urls[key] = {}
+        for extension, path in variants.items():
+            url = storage.url(path)
+            if build_url is not None:
+                url = build_url(url)
+            urls[key][extension] = url
+    return urls
@@ -0,0 +1,44 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import connection
+from django.db.models import F, Q
+
+from .constants import SEARCH_CONFIG
+from .models import Recipe
+
+
+def uses_postgres_search():
+    return connection.vendor == 'postgresql'
+
+
+def recipe_search_vector():
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(recipe_id):
+    if uses_postgres_search():
+        Recipe.objects.filter(pk=recipe_id).update(
+            search_vector=recipe_search_vector(),
+        )
+
+
+def search_recipes(queryset, text):
+    """Rank recipes by full-text match, falling back to name trigrams.
+
+    Without Postgres the lookup degrades to an unranked ``icontains``
+    over name and text.
+    """
+    if not uses_postgres_search():
+        return queryset.filter(
+            Q(name__icontains=text) | Q(text__icontains=text)
+        )
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(
+        Q(search_vector=query) | Q(name__trigram_similar=text)
+    ).annotate(
+        rank=SearchRank(F('search_vector'), query),
+        similarity=TrigramSimilarity('name', text),
+    ).order_by('-rank', '-similarity', '-id')
@@ -0,0 +1,115 @@
+from collections import defaultdict
+
+from django.db.models import Sum
+
+from .models import RecipeIngredients, ShoppingCart, ShoppingCartIngredient
+
+
+def recipe_amounts(recipe):
+    return dict(
+        RecipeIngredients.objects.filter(recipe=recipe).values_list(
+            'ingredient_id', 'amount',
+        )
+    )
+
+
+def recipes_amounts(recipe_ids):
+    return dict(
+        RecipeIngredients.objects.filter(recipe__in=recipe_ids).values(
+            'ingredient_id',
+        ).annotate(total=Sum('amount')).values_list(
+            'ingredient_id', 'total',
+        ).order_by()
+    )
+
+
+def apply_delta(user_ids, delta):
+    """Add ``delta`` ({ingredient_id: amount}) to the users' totals.
+
+    Runs a fixed number of statements whatever the number of users and
+    ingredients; must be called inside the transaction that changed the
+    shopping cart or the recipe.
+    """
+    delta = {pk: amount for pk, amount in delta.items() if amount}
+    user_ids = list(user_ids)
+    if not delta or not user_ids:
+        return
+    ShoppingCartIngredient.objects.bulk_create(
+        [
+            ShoppingCartIngredient(
+                user_id=user_id, ingredient_id=ingredient_id, amount=0,
+            )
+            for user_id in user_ids
+            for ingredient_id in delta
+        ],
+        ignore_conflicts=True,
+    )
+    totals = list(
+        ShoppingCartIngredient.objects.select_for_update().filter(
+            user_id__in=user_ids, ingredient_id__in=delta,
+        ).order_by('pk')
+    )
+    for total in totals:
+        total.amount = max(total.amount + delta[total.ingredient_id], 0)
+    ShoppingCartIngredient.objects.bulk_update(totals, ('amount',))
+    if any(amount < 0 for amount in delta.values()):
+        ShoppingCartIngredient.objects.filter(
+            user_id__in=user_ids, amount=0,
+        ).delete()
+
+
+def add_recipe(user_id, recipe):
+    apply_delta((user_id,), recipe_amounts(recipe))
+
+
+def remove_recipe(user_id, recipe):
+    apply_delta(
+        (user_id,),
+        {pk: -amount for pk, amount in recipe_amounts(recipe).items()},
+    )
+
+
+def add_recipes(user_id, recipe_ids):
+    apply_delta((user_id,), recipes_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    apply_delta(
+        (user_id,),
+        {pk: -amount for pk, amount in recipes_amounts(recipe_ids).items()},
+    )
+
+
+def change_recipe(recipe, old_amounts, new_amounts):
+    delta = defaultdict(int, new_amounts)
+    for pk, amount in old_amounts.items():
+        delta[pk] -= amount
+    apply_delta(
+        ShoppingCart.objects.filter(recipe=recipe).values_list(
+            'user_id', flat=True,
+        ),
+        delta,
+    )
+
+
+def expected_totals(users=None):
+    """Totals computed from the carts, optionally of ``users`` only."""
+    carts = {'recipe__shoppingcart__isnull': False}
+    if users is not None:
+        carts = {'recipe__shoppingcart__user__in': users}
+    return {
+        (row['recipe__shoppingcart__user'], row['ingredient']): row['total']
+        for row in RecipeIngredients.objects.filter(**carts).values(
+            'recipe__shoppingcart__user', 'ingredient',
+        ).annotate(total=Sum('amount')).order_by()
+    }
+
+
+def stored_totals():
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount
+        in ShoppingCartIngredient.objects.values_list(
+            'user_id', 'ingredient_id', 'amount',
+        ).order_by()
+    }
@@ -0,0 +1,98 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import documents, shopping_list
+from .counters import change_favorites_count, change_recipes_count
+from .ingredient_index import ingredient_index
+from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from .renditions import needs_renditions, schedule_renditions
+from .search import update_search_vector
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        shopping_list.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    shopping_list.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorites_count(sender, instance, created, raw=False,
+                              **kwargs):
+    if created and not raw:
+        change_favorites_count(instance.recipe_id, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorites_count(sender, instance, **kwargs):
+    change_favorites_count(instance.recipe_id, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_recipes_count(instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    change_recipes_count(instance.author_id, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def render_image_renditions(sender, instance, raw=False, **kwargs):
+    if not raw and needs_renditions(instance):
+        transaction.on_commit(partial(schedule_renditions, instance.pk))
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_search_vector(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_vector(instance.pk)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def refresh_shown_documents(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        documents.refresh_documents(documents.affected_recipe_ids(instance))
+
+
+@receiver(post_save, sender=User)
+def refresh_author_documents(sender, instance, created, raw=False,
+                             update_fields=None, **kwargs):
+    # Logins save last_login only and leave the documents alone.
+    if created or raw or (
+        update_fields is not None
+        and not set(update_fields) & set(documents.AUTHOR_FIELDS)
+    ):
+        return
+    documents.refresh_documents(documents.affected_recipe_ids(instance))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_shown_documents(sender, instance, **kwargs):
+    # The cascade removes the rows that point at the recipes.
+    instance.document_recipe_ids = documents.affected_recipe_ids(instance)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def refresh_collected_documents(sender, instance, **kwargs):
+    documents.refresh_documents(instance.document_recipe_ids)
@@ -6,7 +6,9 @@ from .models import Follow, User
 
 @admin.register(User)
 class UserAdmin(UserAdmin):
-    list_display = ('id', 'username', 'email', 'first_name', 'last_name')
+    list_display = (
+        'id', 'username', 'email', 'first_name', 'last_name', 'recipes_count',
+    )
     search_fields = ('username', 'email')
     list_filter = ('username', 'email')
 
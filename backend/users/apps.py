@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from api.metrics import metrics
+        from . import signals  # noqa: F401
+        from .authentication import token_cache
+        metrics.add_collector(token_cache.export)
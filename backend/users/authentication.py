@@ -0,0 +1,150 @@
+import pickle
+import threading
+from collections import OrderedDict
+from hashlib import sha256
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+
+
+class TokenCache:
+    """Token -> user lookups in a process-local LRU with a TTL.
+
+    Entries are pickled tokens with their user, so every request gets its
+    own instances. With ``alias`` set, misses fall back to that shared
+    cache before the database. Invalidation clears the local LRU and the
+    shared cache; other processes keep a stale entry at most ``local_ttl``
+    seconds.
+    """
+
+    def __init__(self, size, local_ttl, ttl, alias=None):
+        self.size = size
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self.alias = alias
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.counts = dict.fromkeys(
+            ('local_hit', 'shared_hit', 'miss', 'invalidation'), 0,
+        )
+
+    @staticmethod
+    def cache_key(key):
+        return 'auth-token:' + sha256(key.encode()).hexdigest()
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def get(self, key):
+        now = monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.counts['local_hit'] += 1
+                return pickle.loads(entry[1])
+        data = None
+        if self.alias:
+            data = caches[self.alias].get(self.cache_key(key))
+        if data is None:
+            self.count('miss')
+            return None
+        self.count('shared_hit')
+        self.store_local(key, data)
+        return pickle.loads(data)
+
+    def set(self, key, token):
+        data = pickle.dumps(token, pickle.HIGHEST_PROTOCOL)
+        if self.alias:
+            caches[self.alias].set(self.cache_key(key), data, self.ttl)
+        self.store_local(key, data)
+
+    def store_local(self, key, data):
+        with self.lock:
+            self.entries[key] = (monotonic() + self.local_ttl, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+            self.counts['invalidation'] += len(keys)
+        if self.alias and keys:
+            caches[self.alias].delete_many(map(self.cache_key, keys))
+
+    def invalidate_user(self, user_id):
+        self.invalidate(*Token.objects.filter(user_id=user_id).values_list(
+            'key', flat=True,
+        ))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def export(self):
+        """Counters in the Prometheus text format, see api.metrics."""
+        with self.lock:
+            counts = dict(self.counts)
+            size = len(self.entries)
+        lines = [
+            '# HELP foodgram_token_cache_total Token cache lookups.',
+            '# TYPE foodgram_token_cache_total counter',
+        ]
+        lines.extend(
+            f'foodgram_token_cache_total{{result="{name}"}} {value}'
+            for name, value in counts.items()
+        )
+        lines.extend([
+            '# HELP foodgram_token_cache_size Tokens cached locally.',
+            '# TYPE foodgram_token_cache_size gauge',
+            f'foodgram_token_cache_size {size}',
+        ])
+        return lines
+
+
+token_cache = TokenCache(
+    size=settings.TOKEN_CACHE_SIZE,
+    local_ttl=settings.TOKEN_CACHE_LOCAL_TTL,
+    ttl=settings.TOKEN_CACHE_TTL,
+    alias=settings.TOKEN_CACHE_ALIAS,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the token/user query on cache hits.
+
+    Cached users miss ``F()`` updates such as ``recipes_count``, so unsafe
+    requests, which may save the user, get it reloaded from the database.
+    """
+
+    def authenticate(self, request):
+        credentials = super().authenticate(request)
+        if credentials is None or request.method in SAFE_METHODS:
+            return credentials
+        user, token = credentials
+        try:
+            user.refresh_from_db()
+        except user.DoesNotExist:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        if not user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return user, token
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, token)
+            return user, token
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return token.user, token
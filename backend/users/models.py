@@ -26,6 +26,11 @@ class User(AbstractUser):
         blank=False,
         null=False,
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name=_('recipes count'),
+        default=0,
+        editable=False,
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = [
@@ -1,5 +1,55 @@
-from rest_framework.pagination import PageNumberPagination
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class LimitCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    ordering = '-id'
+
+
+class OptionalCursorPagination(LimitPageNumberPagination):
+    """Page numbers by default, keyset pages without COUNT(*) on request.
+
+    Clients opt in with ``?pagination=cursor`` and then follow the opaque
+    ``next``/``previous`` links, which carry the ``cursor`` parameter.
+    Cursors are keyed on the unique ``-id`` only, so parameters that
+    reorder the results can not be combined with them.
+    """
+    cursor_pagination_class = LimitCursorPagination
+    pagination_query_param = 'pagination'
+    cursor_excluded_params = ('ordering', 'search')
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.pagination_query_param) == 'cursor'
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if not self.use_cursor(request):
+            return super().paginate_queryset(queryset, request, view)
+        excluded = [
+            name for name in self.cursor_excluded_params
+            if name in request.query_params
+        ]
+        if excluded:
+            raise ValidationError({
+                name: [_('can not be combined with cursor pagination')]
+                for name in excluded
+            })
+        self.cursor_paginator = self.cursor_pagination_class()
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is None:
+            return super().get_paginated_response(data)
+        return self.cursor_paginator.get_paginated_response(data)
@@ -2,14 +2,27 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from djoser.serializers import UserSerializer
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
+from rest_framework.settings import api_settings
 
 from api.shared_serializers import ShortRecipeSerializer
+from recipes.batch import insert_ignore
 from .models import Follow
 
 User = get_user_model()
 
 
+def get_recipes_limit(request):
+    recipes_limit = request.query_params.get('recipes_limit')
+    if recipes_limit is None:
+        return None
+    try:
+        return int(recipes_limit)
+    except ValueError:
+        raise serializers.ValidationError(
+            _('recipe_limit must be integer'),
+        )
+
+
 class SubscribedUserSerializer(UserSerializer):
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
@@ -21,6 +34,8 @@ class SubscribedUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -32,7 +47,6 @@ class SubscribedUserSerializer(UserSerializer):
 class FollowListSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -46,6 +60,8 @@ class FollowListSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         return Follow.objects.filter(
             follower=request.user, following=obj
@@ -54,34 +70,23 @@ class FollowListSerializer(serializers.ModelSerializer):
     def get_recipes(self, obj):
         request = self.context.get('request')
         context = {'request': request}
-        recipes_limit = request.query_params.get('recipes_limit')
-        if recipes_limit is not None:
-            try:
-                recipes_limit = int(recipes_limit)
-            except ValueError:
-                raise serializers.ValidationError(
-                    _('recipe_limit must be integer'),
-                )
-        recipes = obj.recipe_set.all()[:recipes_limit]
+        if hasattr(obj, 'recent_recipes'):
+            recipes = obj.recent_recipes
+        else:
+            recipes = obj.recipe_set.all()[:get_recipes_limit(request)]
         return ShortRecipeSerializer(
             recipes, many=True, context=context
         ).data
 
-    def get_recipes_count(self, obj):
-        return obj.recipe_set.count()
-
 
 class FollowSerializer(serializers.ModelSerializer):
+    follower = serializers.HiddenField(
+        default=serializers.CurrentUserDefault(),
+    )
+
     class Meta:
         model = Follow
         fields = ('follower', 'following')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Follow.objects.all(),
-                fields=fields,
-                message=_('You are already subscribed to this author'),
-            )
-        ]
 
     def validate(self, data):
         request = self.context.get('request')
@@ -92,6 +97,20 @@ class FollowSerializer(serializers.ModelSerializer):
             )
         return data
 
+    def create(self, validated_data):
+        added = insert_ignore(
+            Follow,
+            follower_id=validated_data['follower'].pk,
+            following_id=validated_data['following'].pk,
+        )
+        if not added:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    _('You are already subscribed to this author'),
+                ],
+            })
+        return Follow(**validated_data)
+
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
@@ -1,31 +1,51 @@
-from rest_framework.generics import ListAPIView, get_object_or_404
+from django.db.models import OuterRef, Prefetch, Subquery, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
 from rest_framework.status import HTTP_201_CREATED, HTTP_204_NO_CONTENT
 from rest_framework.views import APIView
 
+from recipes.models import Recipe
 from .models import Follow, User
-from .serializers import FollowListSerializer, FollowSerializer
+from .pagination import OptionalCursorPagination
+from .serializers import (FollowListSerializer, FollowSerializer,
+                          get_recipes_limit)
 
 
 class FollowListAPIView(ListAPIView):
     serializer_class = FollowListSerializer
+    pagination_class = OptionalCursorPagination
 
     def get_queryset(self):
-        return User.objects.filter(following__follower=self.request.user)
+        recipes = Recipe.objects.all()
+        recipes_limit = get_recipes_limit(self.request)
+        if recipes_limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author'),
+                ).order_by('-id').values('pk')[:recipes_limit]
+            ))
+        return User.objects.filter(
+            following__follower=self.request.user,
+        ).annotate(
+            is_subscribed=Value(True),
+        ).prefetch_related(
+            Prefetch('recipe_set', queryset=recipes, to_attr='recent_recipes')
+        )
 
 
 class FollowAPIView(APIView):
     def post(self, request, *args, **kwargs):
-        data = {'follower': request.user.id, 'following': kwargs.get('id')}
+        data = {'following': kwargs.get('id')}
         serializer = FollowSerializer(data=data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=HTTP_201_CREATED)
 
     def delete(self, request, *args, **kwargs):
-        following = get_object_or_404(User, id=kwargs.get('id'))
-        follow = get_object_or_404(
-            Follow, follower=request.user, following=following
-        )
-        follow.delete()
+        deleted, _ = Follow.objects.filter(
+            follower=request.user, following_id=kwargs.get('id'),
+        ).delete()
+        if not deleted:
+            raise NotFound()
         return Response(status=HTTP_204_NO_CONTENT)